@@ -0,0 +1,46 @@
+import argparse
+import json
+import sys
+
+# Flags benchmarks that got slower between two pytest-benchmark JSON files:
+#   pytest benchmarks --benchmark-json=benchmarks/baseline.json    (before the change)
+#   pytest benchmarks --benchmark-json=benchmarks/current.json     (after)
+#   python benchmarks/compare.py benchmarks/baseline.json benchmarks/current.json --threshold 0.10
+# Exits with 1 when any benchmark is slower than baseline by more than threshold.
+
+
+def load(path: str, stat: str) -> dict[str, float]:
+    with open(path) as f:
+        return {b["name"]: b["stats"][stat] for b in json.load(f)["benchmarks"]}
+
+
+def compare(baseline: dict[str, float], current: dict[str, float],
+            threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    """ (name, baseline, current, change, slower) for every benchmark in both, change = current / baseline - 1 and
+        slower when change is more than threshold"""
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        change = current[name] / baseline[name] - 1
+        rows.append((name, baseline[name], current[name], change, change > threshold))
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="compare two pytest-benchmark JSON files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 is 10%%")
+    parser.add_argument("--stat", default="min", help="statistic to compare, min is the least noisy")
+    args = parser.parse_args(argv)
+
+    rows = compare(load(args.baseline, args.stat), load(args.current, args.stat), args.threshold)
+    slower = 0
+    for name, before, after, change, flag in rows:
+        slower += flag
+        print(f"{name:<40}{before * 1e6:>12.2f}us{after * 1e6:>12.2f}us{change:>+9.1%}  {'SLOWER' if flag else ''}")
+    print(f"{slower} of {len(rows)} benchmarks slower than {args.threshold:.0%}")
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import copy
+
+import pytest
+
+from card_model import CARDS, Deck
+from simulate import GreedyPolicy, playGame
+from solitaire import Game, computeOptions, executeInput
+
+# Engine hot paths.  Run with
+#   pytest benchmarks --benchmark-json=benchmarks/current.json
+# and compare against a saved run with benchmarks/compare.py
+
+pytest.importorskip("pytest_benchmark")
+
+SEEDS = range(8)  # the fixed games of the end to end benchmark
+
+
+def startedGame(seed: int = 1) -> Game:
+    game = Game()
+    game.start(seed)
+    return game
+
+
+# ####################################################################################################################
+#  Deck
+# ####################################################################################################################
+
+def test_deck_get_put(benchmark):
+    deck = Deck.build_standard_52_deck()
+
+    def run():
+        for _ in range(52):
+            deck.putOne(deck.getOne())
+    benchmark(run)
+
+
+def test_deck_take_give(benchmark):
+    deck = Deck.build_standard_52_deck()
+
+    def run():
+        for _ in range(17):
+            deck.giveCodes(deck.takeCodes(3))
+    benchmark(run)
+
+
+def test_deck_append_slice(benchmark):
+    source, dest = Deck(cards=list(CARDS[:13])), Deck()
+
+    def run():
+        dest.appendMany(source.getManySlice(start=0, end=13))
+        source.appendMany(dest.getManySlice(start=0, end=13))
+    benchmark(run)
+
+
+def test_deck_shuffle(benchmark):
+    deck = Deck.build_standard_52_deck()
+    benchmark(deck.shuffle)
+
+
+# ####################################################################################################################
+#  Game
+# ####################################################################################################################
+
+def test_game_start(benchmark):
+    benchmark(startedGame)
+
+
+def test_deal_cycle(benchmark):
+    """ 8 deals: through the deal deck and one recycle"""
+    game = startedGame()
+
+    def run():
+        for _ in range(8):
+            game.deal()
+    benchmark(run)
+
+
+def test_compute_options(benchmark):
+    state = startedGame().state()
+    benchmark(computeOptions, state)
+
+
+def test_execute_input_with_undo(benchmark):
+    game = startedGame()
+    action = computeOptions(game.state())[0]
+    mark = game.mark()
+
+    def run():
+        executeInput(game, firstToken=action.src, secondToken=action.dest)
+        game.undo(mark)
+    benchmark(run)
+
+
+# ####################################################################################################################
+#  Copying a position
+# ####################################################################################################################
+
+def test_copy_deepcopy(benchmark):
+    # copy.deepcopy of the fields: deepcopy of the GameState itself goes through __reduce__, which is the codec
+    state = startedGame().state()
+
+    def run():
+        copied = object.__new__(type(state))
+        copied.__dict__.update(copy.deepcopy(state.__dict__))
+        return copied
+    assert run().to_bytes() == state.to_bytes()
+    benchmark(run)
+
+
+def test_copy_snapshot_restore(benchmark):
+    state = startedGame().state()
+    snapshot = state.snapshot()
+
+    def run():
+        state.restore(state.snapshot())
+    benchmark(run)
+    assert state.snapshot() == snapshot
+
+
+def test_copy_clone(benchmark):
+    benchmark(startedGame().state().clone)
+
+
+def test_copy_bytes(benchmark):
+    state = startedGame().state()
+    benchmark(lambda: type(state).from_bytes(state.to_bytes()))
+
+
+# ####################################################################################################################
+#  End to end
+# ####################################################################################################################
+
+def test_games_per_second(benchmark):
+    def run():
+        return [playGame(seed, GreedyPolicy, max_moves=300) for seed in SEEDS]
+    records = benchmark.pedantic(run, rounds=3, iterations=1)
+    benchmark.extra_info["games"] = len(records)
+    if benchmark.enabled:  # no stats with --benchmark-disable
+        benchmark.extra_info["games_per_second"] = len(records) / benchmark.stats.stats.mean
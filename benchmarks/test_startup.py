@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Time to start a Python process that imports the engine, what every spawned worker process pays.
+
+pytest.importorskip("pytest_benchmark")
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src", "pysolitaire")
+
+
+def startup(imports: str) -> None:
+    subprocess.run([sys.executable, "-c", f"import {imports}" if imports else "pass"], cwd=SRC, check=True)
+
+
+@pytest.mark.parametrize("imports", ["", "solitaire", "solver", "simulate", "parallel"])
+def test_import_time(benchmark, imports):
+    """ "" is a bare interpreter, the others are measured against it with benchmarks/compare.py"""
+    benchmark.pedantic(startup, args=(imports,), rounds=10, iterations=1)
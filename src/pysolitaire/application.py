@@ -1,21 +1,177 @@
 from textual.app import App, ComposeResult, RenderResult
+from textual.containers import Horizontal, Vertical
 from textual.widget import Widget
+from textual.widgets import Input, Static
 
+from solitaire import ALL_STACKS, Game, executeInput, render_card
+
+# Each SuitStack, BuildStack and the talon is a widget.  The app subscribes to the Game and, after a move,
+# refreshes only the widgets of the stacks the move touched.  A widget keeps its markup until its stack changes.
+
+COMMA = ','
+
+
+class StackWidget(Widget):
+    """ one stack of the game.  markup() is only called again after changed()"""
+
+    DEFAULT_CSS = """
+    StackWidget { height: 1; }
+    """
+
+    def __init__(self, game: Game, stack_id: str):
+        super().__init__(id=f"stack-{stack_id}")
+        self.game = game
+        self.stack_id = stack_id
+        self._markup: str | None = None
+        self.paints = 0  # times the markup was rebuilt
+
+    def changed(self) -> None:
+        self._markup = None
+        self.refresh()
+
+    def markup(self) -> str:
+        """ the stack's id, the widgets of each kind of stack show its cards"""
+        return f"[{self.stack_id}]"
+
+    def render(self) -> RenderResult:
+        if self._markup is None:
+            self._markup = self.markup()
+            self.paints += 1
+        return self._markup
+
+
+class SuitStackWidget(StackWidget):
+
+    NAMES = {"c": "[C]lub", "d": "[D]iamond", "s": "[S]pade", "h": "[H]eart"}
+
+    def markup(self) -> str:
+        stack = self.game.getSuitStack(self.stack_id)
+        return f"{self.NAMES[self.stack_id]}: {render_card(stack.peekLast())}"
+
+
+class BuildStackWidget(StackWidget):
+
+    def markup(self) -> str:
+        b = self.game.getBuildStack(int(self.stack_id) - 1)
+        if self.game.state().rules.thoughtful:
+            hidden = COMMA.join([render_card(c) for c in reversed(b.hidden_deck.cards)])
+        else:
+            hidden = b.hidden_size()
+        return f"[{self.stack_id}] <{hidden}>: {COMMA.join([render_card(c) for c in b.visible_deck.cards])}"
+
+
+class TalonWidget(StackWidget):
+    """ the talon and the deal deck"""
+
+    def markup(self) -> str:
+        state = self.game.state()
+        return (f"[T]alon: {COMMA.join([render_card(c) for c in state.talon.cards[:3]])}"
+                f"  ({state.talon.size()} + {state.deal_deck.size()} to deal)")
+
+
+class HintsPanel(Widget):
+    """ the best moves of the game's HintEngine.  The engine thinks between frames so hints are always ready"""
+
+    DEFAULT_CSS = """
+    HintsPanel { height: 1; }
+    """
+
+    def __init__(self, game: Game):
+        super().__init__()
+        self.engine = game.hintEngine()
+
+    def on_mount(self) -> None:
+        self.set_interval(0.05, self.think)
+
+    async def think(self) -> None:
+        if await self.engine.think(0.02):
+            self.refresh()
+
+    def render(self) -> RenderResult:
+        hints = self.engine.hints()
+        return "Hints: " + "  ".join(f"{action.display()} ({value:.0f})" for action, value in hints)
 
-class SolitaireState(Widget):
-    def render(self)->RenderResult:
-        return "Hello [b]World[/b]!"
 
 class SolitaireApp(App):
     # CSS_PATH = ""
 
+    BINDINGS = [("ctrl+a", "autoplay", "Autoplay")]
+
+    def __init__(self, game: Game | None = None):
+        super().__init__()
+        if game is None:
+            game = Game()
+            game.start()
+        self.game = game
+        self.stacks: dict[str, StackWidget] = {}
+        self.autoplaying = None
+
     def compose(self) -> ComposeResult:
-        yield SolitaireState()
+        suitstacks = [SuitStackWidget(self.game, sid) for sid in "cdsh"]
+        buildstacks = [BuildStackWidget(self.game, bid) for bid in reversed(self.game.buildstack_ids)]
+        talon = TalonWidget(self.game, "T")
+        for widget in [*suitstacks, *buildstacks, talon]:
+            self.stacks[widget.stack_id] = widget
+        self.stacks["X"] = talon  # the deal deck is shown with the talon
+
+        yield Horizontal(*suitstacks, id="suitstacks")
+        yield Vertical(*buildstacks, id="buildstacks")
+        yield talon
+        yield HintsPanel(self.game)
+        yield Static("", id="status")
+        yield Input(placeholder="move, e.g. 7-2 or T-c.  X deals", id="command")
 
     def on_mount(self) -> None:
         self.screen.styles.background = "darkblue"
+        self.game.subscribe(self.gameChanged)
+
+    def on_unmount(self) -> None:
+        self.game.unsubscribe(self.gameChanged)
+
+    def gameChanged(self, game: Game, ids) -> None:
+        if ids is ALL_STACKS:
+            ids = self.stacks.keys()
+        for sid in ids:
+            widget = self.stacks.get(sid)
+            if widget is not None:
+                widget.changed()
+
+    def play(self, first: str, second: str | None) -> str:
+        """ plays a move if it is legal.  Returns the status line"""
+        game = self.game
+        if first in ('x', 'X') and not second:
+            if not game.canDeal():
+                return "nothing to deal"
+        elif not any(a.src.lower() == first.lower() and a.dest.lower() == (second or "").lower() for a in game.moves()):
+            return f"illegal move {first}-{second}"
+        executeInput(game, firstToken=first, secondToken=second)
+        game.autoComplete()
+        return "won!" if game.state().isWon() else ""
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        tokens = event.value.strip().split('-')
+        event.input.value = ""
+        if not tokens[0]:
+            return
+        status = self.play(tokens[0], tokens[1] if len(tokens) > 1 else None)
+        self.query_one("#status", Static).update(status)
+
+    def action_autoplay(self) -> None:
+        """ plays the best hint every 50 ms until pressed again"""
+        if self.autoplaying is not None:
+            self.autoplaying.stop()
+            self.autoplaying = None
+            return
+        self.autoplaying = self.set_interval(0.05, self.autoplayStep)
+
+    def autoplayStep(self) -> None:
+        action = self.game.hintEngine().best()
+        if action is None or self.game.state().isWon():
+            self.action_autoplay()
+            return
+        self.play(action.src, action.dest or None)
 
 
 if __name__ == "__main__":
     app = SolitaireApp()
-    app.run()
\ No newline at end of file
+    app.run()
@@ -0,0 +1,316 @@
+import random
+
+import numpy as np
+
+from card_model import CARD_COUNT, CARD_RANK, CARD_SUIT, Deck
+from rules import KING, STACK_ON
+from solitaire import Game, GameState
+
+# K games held as NumPy arrays and stepped in lockstep.  Every array has the game on axis 0 and card
+# codes are int8 with -1 for "no card".  Piles are stored bottom first so their top is at [count - 1]:
+#
+#   hidden    (K, 7, 6)   hidden cards of each BuildStack       hidden_count  (K, 7)
+#   visible   (K, 7, 13)  visible cards of each BuildStack      visible_count (K, 7)
+#   foundation (K, 4)     cards on each SuitStack, by CardSuit.value - 1
+#   talon     (K, 24)     talon, top at talon_count - 1         talon_count (K,)
+#   stock     (K, 24)     deal deck, top at stock_count - 1     stock_count (K,)
+#
+# A move is src * 11 + dest with src 0-6 BuildStacks, 7 talon, 8-11 SuitStacks and dest 0-6 BuildStacks,
+# 7-10 SuitStacks.  DEAL is a deal.  The rules are the ones of executeInput / Game.deal.
+
+COLUMNS = 7
+HIDDEN_MAX = 6
+VISIBLE_MAX = 13
+STOCK_MAX = 24
+SUITS = 4
+
+TALON_SRC = 7
+DESTS = 11
+DEAL = 12 * DESTS
+MOVE_COUNT = DEAL + 1
+
+SUITSTACK_IDS = "scdh"  # SuitStack id by CardSuit.value - 1
+
+RANK = np.frombuffer(CARD_RANK, dtype=np.uint8).astype(np.int16)
+SUIT = np.frombuffer(CARD_SUIT, dtype=np.uint8).astype(np.int16)
+
+# STACK[source, destination]: can source go on destination, destination -1 is an empty BuildStack (see rules.STACK_ON)
+STACK = np.frombuffer(b''.join(STACK_ON), dtype=np.uint8).reshape(CARD_COUNT, -1).astype(bool)
+
+_BS_BS = np.array([i * DESTS + j for i in range(COLUMNS) for j in range(COLUMNS)])
+
+
+def moveTokens(move: int) -> tuple[str, str | None]:
+    """ the executeInput tokens of a move"""
+    if move == DEAL:
+        return 'X', None
+    src, dest = divmod(move, DESTS)
+    if src < COLUMNS:
+        first = str(src + 1)
+    elif src == TALON_SRC:
+        first = 'T'
+    else:
+        first = SUITSTACK_IDS[src - TALON_SRC - 1]
+    second = str(dest + 1) if dest < COLUMNS else SUITSTACK_IDS[dest - COLUMNS]
+    return first, second
+
+
+class BatchGames:
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hidden = np.full((size, COLUMNS, HIDDEN_MAX), -1, dtype=np.int8)
+        self.hidden_count = np.zeros((size, COLUMNS), dtype=np.int16)
+        self.visible = np.full((size, COLUMNS, VISIBLE_MAX), -1, dtype=np.int8)
+        self.visible_count = np.zeros((size, COLUMNS), dtype=np.int16)
+        self.foundation = np.zeros((size, SUITS), dtype=np.int16)
+        self.talon = np.full((size, STOCK_MAX), -1, dtype=np.int8)
+        self.talon_count = np.zeros(size, dtype=np.int16)
+        self.stock = np.full((size, STOCK_MAX), -1, dtype=np.int8)
+        self.stock_count = np.zeros(size, dtype=np.int16)
+
+    # ################################################################################################################
+    #  Conversion from and to GameState
+    # ################################################################################################################
+
+    @classmethod
+    def fromStates(cls, states: list[GameState]) -> 'BatchGames':
+        games = cls(len(states))
+        for k, state in enumerate(states):
+            if (state.rules.draw, state.rules.passes, state.rules.columns) != (3, None, 7):
+                raise ValueError("BatchGames only plays draw 3, unlimited passes and 7 BuildStacks")
+            for i, b in enumerate(state.buildstacks):
+                hidden = bytes(reversed(b.hidden_deck.codes))  # GameState keeps the next card to turn at pos 0
+                visible = bytes(b.visible_deck.codes)
+                if len(hidden) > HIDDEN_MAX or len(visible) > VISIBLE_MAX:
+                    raise ValueError(f"BuildStack {i + 1} does not fit the batch layout")
+                games.hidden[k, i, :len(hidden)] = list(hidden)
+                games.hidden_count[k, i] = len(hidden)
+                games.visible[k, i, :len(visible)] = list(visible)
+                games.visible_count[k, i] = len(visible)
+            for s in state.suitstacks.values():
+                games.foundation[k, s.suit_index] = s.deck.size()
+            talon = bytes(reversed(state.talon.codes))
+            stock = bytes(reversed(state.deal_deck.codes))
+            games.talon[k, :len(talon)] = list(talon)
+            games.talon_count[k] = len(talon)
+            games.stock[k, :len(stock)] = list(stock)
+            games.stock_count[k] = len(stock)
+        return games
+
+    def toState(self, k: int) -> GameState:
+        game = Game()
+        state = game.state()
+        state.deal_deck.splice(0, state.deal_deck.size(), bytes(reversed(self.stock[k, :self.stock_count[k]].tobytes())))
+        state.talon.splice(0, 0, bytes(reversed(self.talon[k, :self.talon_count[k]].tobytes())))
+        for s in state.suitstacks.values():
+            s.deck.splice(0, 0, bytes(range(s.suit_index * 13, s.suit_index * 13 + self.foundation[k, s.suit_index])))
+        for i, b in enumerate(state.buildstacks):
+            b.hidden_deck.splice(0, 0, bytes(reversed(self.hidden[k, i, :self.hidden_count[k, i]].tobytes())))
+            b.visible_deck.splice(0, 0, self.visible[k, i, :self.visible_count[k, i]].tobytes())
+        return state
+
+    @classmethod
+    def fromOrders(cls, orders: np.ndarray) -> 'BatchGames':
+        """ start one game per row of orders (K, 52), each an order of the 52 codes as Game.start() deals it"""
+        games = cls(len(orders))
+        orders = np.asarray(orders, dtype=np.int8)
+        for name in ("hidden", "visible", "talon", "stock"):
+            positions = getattr(_LAYOUT, name)[0]
+            dealt = orders[:, np.maximum(positions, 0)]
+            setattr(games, name, np.where(positions >= 0, dealt, -1).astype(np.int8))
+        for name in ("hidden_count", "visible_count", "talon_count", "stock_count"):
+            setattr(games, name, np.repeat(getattr(_LAYOUT, name), len(orders), axis=0))
+        return games
+
+    @classmethod
+    def fromSeeds(cls, seeds: list[int]) -> 'BatchGames':
+        """ the same deals as Game().start(seed)"""
+        orders = np.empty((len(seeds), CARD_COUNT), dtype=np.int8)
+        for k, seed in enumerate(seeds):
+            deck = Deck.build_standard_52_deck()
+            deck.shuffle(random.Random(seed))
+            orders[k] = list(deck.codes)
+        return cls.fromOrders(orders)
+
+    # ################################################################################################################
+    #  Rules
+    # ################################################################################################################
+
+    def won(self) -> np.ndarray:
+        return self.foundation.sum(axis=1) == CARD_COUNT
+
+    def _tops(self) -> np.ndarray:
+        """ code of the top visible card of every BuildStack, -1 when empty.  (K, 7)"""
+        count = self.visible_count
+        top = np.take_along_axis(self.visible, np.maximum(count - 1, 0)[:, :, None], axis=2)[:, :, 0]
+        return np.where(count > 0, top, -1).astype(np.int16)
+
+    def _firstFit(self, k, tops: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """ for every (game k, source, destination) BuildStack: can the source move and the index of the
+            first visible card that fits, the card executeInput moves.  (len(k), 7, 7) each"""
+        visible = np.maximum(self.visible[k], 0)
+        in_pile = np.arange(VISIBLE_MAX)[None, None, :] < self.visible_count[k][:, :, None]
+        fits = STACK[visible[:, :, :, None], tops[:, None, None, :]] & in_pile[:, :, :, None]
+        first = fits.argmax(axis=2)
+        movable = fits.any(axis=2)
+
+        # a King that is already at the bottom of its pile does not move to another empty pile
+        king_at_bottom = (RANK[visible[:, :, 0]] == KING) & (self.hidden_count[k] == 0)
+        movable &= ~((first == 0) & king_at_bottom[:, :, None])
+        movable[:, np.arange(COLUMNS), np.arange(COLUMNS)] = False
+        return movable, first
+
+    def _foundationFits(self, codes: np.ndarray) -> np.ndarray:
+        safe = np.maximum(codes, 0)
+        heights = np.take_along_axis(self.foundation, SUIT[safe].reshape(len(codes), -1), axis=1).reshape(codes.shape)
+        return (codes >= 0) & (heights == RANK[safe] - 1)
+
+    def _suitTops(self) -> np.ndarray:
+        return np.where(self.foundation > 0, np.arange(SUITS) * 13 + self.foundation - 1, -1)
+
+    def _talonTop(self) -> np.ndarray:
+        top = self.talon[np.arange(self.size), np.maximum(self.talon_count - 1, 0)]
+        return np.where(self.talon_count > 0, top, -1).astype(np.int16)
+
+    def legalMask(self) -> np.ndarray:
+        """ (K, MOVE_COUNT) bool, the moves computeOptions lists plus DEAL when Game.canDeal()"""
+        size = self.size
+        games = np.arange(size)
+        mask = np.zeros((size, MOVE_COUNT), dtype=bool)
+        tops = self._tops()
+
+        # BuildStack to SuitStack
+        fits = self._foundationFits(tops)
+        k, i = np.nonzero(fits)
+        mask[k, i * DESTS + COLUMNS + SUIT[tops[k, i]]] = True
+
+        # BuildStack to BuildStack
+        movable, first = self._firstFit(slice(None), tops)
+        mask[:, _BS_BS] = movable.reshape(size, -1)
+
+        # Talon to SuitStack and BuildStacks
+        talon = self._talonTop()
+        k = np.nonzero(self._foundationFits(talon))[0]
+        mask[k, TALON_SRC * DESTS + COLUMNS + SUIT[talon[k]]] = True
+        mask[:, TALON_SRC * DESTS:TALON_SRC * DESTS + COLUMNS] = (talon >= 0)[:, None] & STACK[np.maximum(talon, 0)[:, None], tops]
+
+        # SuitStacks to BuildStacks
+        suit_tops = self._suitTops()
+        from_suits = (suit_tops >= 0)[:, :, None] & STACK[np.maximum(suit_tops, 0)[:, :, None], tops[:, None, :]]
+        for s in range(SUITS):
+            src = TALON_SRC + 1 + s
+            mask[:, src * DESTS:src * DESTS + COLUMNS] = from_suits[:, s]
+
+        mask[games, DEAL] = (self.stock_count > 2) | (self.talon_count > 0)
+        return mask
+
+    # ################################################################################################################
+    #  Moves
+    # ################################################################################################################
+
+    def apply(self, moves: np.ndarray) -> None:
+        """ play moves[k] in game k, -1 to leave a game alone.  Moves must be legal (see legalMask)"""
+        moves = np.asarray(moves)
+        playing = np.nonzero((moves >= 0) & (moves != DEAL))[0]
+        if len(playing):
+            self._move(playing, moves[playing])
+        dealing = np.nonzero(moves == DEAL)[0]
+        if len(dealing):
+            self._deal(dealing)
+
+    def _move(self, k: np.ndarray, moves: np.ndarray) -> None:
+        src, dest = np.divmod(moves, DESTS)
+        n = len(k)
+        cards = np.full((n, VISIBLE_MAX), -1, dtype=np.int8)
+        count = np.ones(n, dtype=np.int16)
+
+        # take the cards from the source
+        from_column = src < COLUMNS
+        c = np.nonzero(from_column)[0]
+        if len(c):
+            kc, sc = k[c], src[c]
+            pile_size = self.visible_count[kc, sc]
+            start = pile_size - 1
+            to_column = dest[c] < COLUMNS
+            if to_column.any():
+                movable, first = self._firstFit(kc, self._tops()[kc])
+                start = np.where(to_column, first[np.arange(len(c)), sc, np.minimum(dest[c], COLUMNS - 1)], start)
+            count[c] = pile_size - start
+            for offset in range(VISIBLE_MAX):
+                take = offset < count[c]
+                cards[c[take], offset] = self.visible[kc[take], sc[take], start[take] + offset]
+            self.visible_count[kc, sc] = start
+            self._turnOver(kc, sc)
+
+        t = np.nonzero(src == TALON_SRC)[0]
+        if len(t):
+            kt = k[t]
+            self.talon_count[kt] -= 1
+            cards[t, 0] = self.talon[kt, self.talon_count[kt]]
+
+        f = np.nonzero(src > TALON_SRC)[0]
+        if len(f):
+            kf, suit = k[f], src[f] - TALON_SRC - 1
+            self.foundation[kf, suit] -= 1
+            cards[f, 0] = suit * 13 + self.foundation[kf, suit]
+
+        # put them on the destination
+        d = np.nonzero(dest < COLUMNS)[0]
+        if len(d):
+            kd, dd = k[d], dest[d]
+            base = self.visible_count[kd, dd]
+            for offset in range(VISIBLE_MAX):
+                put = offset < count[d]
+                self.visible[kd[put], dd[put], base[put] + offset] = cards[d[put], offset]
+            self.visible_count[kd, dd] = base + count[d]
+
+        s = np.nonzero(dest >= COLUMNS)[0]
+        if len(s):
+            self.foundation[k[s], dest[s] - COLUMNS] += 1
+
+    def _turnOver(self, k: np.ndarray, column: np.ndarray) -> None:
+        """ turn over the next hidden card of BuildStacks that have no visible card left"""
+        turn = (self.visible_count[k, column] == 0) & (self.hidden_count[k, column] > 0)
+        k, column = k[turn], column[turn]
+        self.hidden_count[k, column] -= 1
+        self.visible[k, column, 0] = self.hidden[k, column, self.hidden_count[k, column]]
+        self.visible_count[k, column] = 1
+
+    def _deal(self, k: np.ndarray) -> None:
+        # with 2 or less cards left the talon is turned over under them (see Game.deal)
+        recycle = k[(self.stock_count[k] <= 2) & (self.talon_count[k] > 0)]
+        if len(recycle):
+            talon_count = self.talon_count[recycle][:, None]
+            stock_count = self.stock_count[recycle][:, None]
+            position = np.arange(STOCK_MAX)[None, :]
+            from_talon = self.talon[recycle[:, None], np.clip(talon_count - 1 - position, 0, STOCK_MAX - 1)]
+            from_stock = self.stock[recycle[:, None], np.clip(stock_count - 1 - (position - talon_count), 0, STOCK_MAX - 1)]
+            self.stock[recycle] = np.where(position < talon_count, from_talon,
+                                           np.where(position < talon_count + stock_count, from_stock, -1))
+            self.stock_count[recycle] += self.talon_count[recycle]
+            self.talon_count[recycle] = 0
+
+        draw = k[self.stock_count[k] > 2]
+        for i in range(3):
+            self.talon[draw, self.talon_count[draw]] = self.stock[draw, self.stock_count[draw] - 1]
+            self.talon_count[draw] += 1
+            self.stock_count[draw] -= 1
+
+    def playRandom(self, rng: np.random.Generator, steps: int) -> None:
+        """ every game plays steps random legal moves, stopping when it has none"""
+        for _ in range(steps):
+            mask = self.legalMask()
+            weights = rng.random(mask.shape) * mask
+            moves = np.where(mask.any(axis=1), weights.argmax(axis=1), -1)
+            self.apply(moves)
+
+
+def _layout() -> BatchGames:
+    """ where Game.start() puts each position of the deal order, as a batch of 1 game holding positions"""
+    game = Game()
+    game.start(deal=0)  # deal 0 deals the codes in order, so every card code is its position
+    return BatchGames.fromStates([game.state()])
+
+
+_LAYOUT = _layout()
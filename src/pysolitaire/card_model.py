@@ -34,7 +34,7 @@ class CardSuit(Enum):
     HEARTS = 4
 
     def isRed(self) -> bool:
-        return self in [CardSuit.DIAMONDS, CardSuit.HEARTS]
+        return self is CardSuit.DIAMONDS or self is CardSuit.HEARTS
 
     def isBlack(self) -> bool:
         return not self.isRed()
@@ -54,23 +54,115 @@ class CardSuit(Enum):
 class Card:
     value: CardValue
     suit: CardSuit
+    # small int 0-51 identifying the card. Engine state stores only this code (see CARDS)
+    code: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.code = (self.suit.value - 1) * 13 + self.value.value - 1
 
     def isRed(self) -> bool:
-        return self.suit.isRed()
+        return CARD_RED[self.code] == 1
 
     def isBlack(self) -> bool:
-        return self.suit.isBlack()
+        return CARD_RED[self.code] == 0
 
     def getIntValue(self) -> int:
-        return self.value.value
+        return CARD_RANK[self.code]
 
     def __str__(self):
         return f"{self.value}{self.suit}"
 
 
-@dataclass()
+# ####################################################################################################################
+# Integer card codes: code = (suit - 1) * 13 + (value - 1).  Tables are indexed by code.
+# ####################################################################################################################
+
+CARD_COUNT = 52
+CARD_RANK = bytes(c % 13 + 1 for c in range(CARD_COUNT))   # 1 (ACE) .. 13 (KING)
+CARD_SUIT = bytes(c // 13 for c in range(CARD_COUNT))      # CardSuit.value - 1
+CARD_RED = bytes(1 if CardSuit(c // 13 + 1).isRed() else 0 for c in range(CARD_COUNT))
+
+# one shared Card per code. Decks hand these out so no Card is allocated on peek/getOne
+CARDS: tuple[Card, ...] = tuple(Card(value=CardValue(c % 13 + 1), suit=CardSuit(c // 13 + 1)) for c in range(CARD_COUNT))
+
+
+def cardFromCode(code: int) -> Card:
+    return CARDS[code]
+
+
+# ####################################################################################################################
+# A deal is an ordering of the 52 codes.  Its Lehmer code is a number below 52! which fits in DEAL_BITS bits
+# ####################################################################################################################
+
+DEAL_BITS = 226
+DEAL_BYTES = (DEAL_BITS + 7) // 8
+
+
+def permutationIndex(codes) -> int:
+    """ Lehmer code of an ordering of all 52 card codes"""
+    if len(codes) != CARD_COUNT:
+        raise ValueError(f"a deal has {CARD_COUNT} cards, not {len(codes)}")
+
+    unused = (1 << CARD_COUNT) - 1
+    index = 0
+    for i, c in enumerate(codes):
+        bit = 1 << c
+        if not unused & bit:
+            raise ValueError(f"card {c} is in the deal twice")
+        index = index * (CARD_COUNT - i) + (unused & (bit - 1)).bit_count()
+        unused ^= bit
+    return index
+
+
+def permutationFromIndex(index: int) -> bytearray:
+    """ the ordering of the 52 card codes with Lehmer code index"""
+    digits = []
+    for radix in range(1, CARD_COUNT + 1):
+        index, digit = divmod(index, radix)
+        digits.append(digit)
+    if index:
+        raise ValueError("not a deal index, it is 52! or more")
+
+    remaining = list(range(CARD_COUNT))
+    return bytearray(remaining.pop(d) for d in reversed(digits))
+
+
 class Deck:
-    cards: list[Card] = field(default_factory=list)
+    """ cards are stored as one byte per card in codes.  POS 0 is the top of the deck.
+        The Card based methods are a view over codes.
+
+        When journal is set (see Game.mark) every change is recorded as (deck, pos, old codes, new count)
+        so it can be reverted.
+
+        When keys is set (see zobrist.bindKeys) hash is kept up to date on every change.  A card's key
+        depends on its distance from the head, or from the tail when tail_anchored, so changes at the
+        other end cost O(cards changed)"""
+
+    def __init__(self, cards: list[Card] | None = None):
+        self.codes: bytearray = bytearray(c.code for c in cards) if cards else bytearray()
+        self.journal: list | None = None
+        self.keys: list[int] | None = None
+        self.tail_anchored: bool = False
+        self.hash: int = 0
+
+    @classmethod
+    def fromCodes(cls, codes) -> 'Deck':
+        deck = cls()
+        deck.codes[:] = codes
+        return deck
+
+    @property
+    def cards(self) -> list[Card]:
+        """ the cards top first.  This is a copy, changing the list does not change the deck"""
+        return [CARDS[c] for c in self.codes]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Deck):
+            return NotImplemented
+        return self.codes == other.codes
+
+    def __repr__(self) -> str:
+        return f"Deck(cards={self.cards!r})"
 
     @classmethod
     def build_standard_52_deck(cls):
@@ -82,31 +174,136 @@ class Deck:
 
         return Deck(cards=[Card(suit=s, value=v) for s in card_suits for v in card_values])
 
-    def shuffle(self) -> None:
-        random.shuffle(self.cards)
+    def rehash(self) -> None:
+        keys = self.keys
+        if keys is None:
+            return
+        h = 0
+        size = len(self.codes)
+        for i, c in enumerate(self.codes):
+            depth = size - 1 - i if self.tail_anchored else i
+            h ^= keys[depth * CARD_COUNT + c]
+        self.hash = h
+
+    def _hashSplice(self, pos: int, old, new, size: int) -> None:
+        """ update hash after the codes old at pos were replaced by new. size is the size before the change"""
+        keys = self.keys
+        h = self.hash
+        if self.tail_anchored:
+            if pos != 0:
+                self.rehash()
+                return
+            for i, c in enumerate(old):
+                h ^= keys[(size - 1 - i) * CARD_COUNT + c]
+            size = size - len(old) + len(new)
+            for i, c in enumerate(new):
+                h ^= keys[(size - 1 - i) * CARD_COUNT + c]
+        else:
+            if pos + len(old) != size:
+                self.rehash()
+                return
+            for i, c in enumerate(old):
+                h ^= keys[(pos + i) * CARD_COUNT + c]
+            for i, c in enumerate(new):
+                h ^= keys[(pos + i) * CARD_COUNT + c]
+        self.hash = h
+
+    def splice(self, pos: int, count: int, codes: bytes) -> None:
+        """ replace count codes at pos with codes without journaling. Used to undo a journal entry"""
+        size = len(self.codes)
+        old = bytes(self.codes[pos:pos + count]) if self.keys is not None else b''
+        self.codes[pos:pos + count] = codes
+        if self.keys is not None:
+            self._hashSplice(pos, old, codes, size)
+
+    def shuffle(self, rng: random.Random | None = None) -> None:
+        """ shuffle with rng, or with the module level random when rng is None"""
+        if self.journal is not None:
+            self.journal.append((self, 0, bytes(self.codes), len(self.codes)))
+        (rng or random).shuffle(self.codes)
+        self.rehash()
+
+    def permutationIndex(self) -> int:
+        """ the order of a full 52 card deck as a number below 52!  (see permutationIndex)"""
+        return permutationIndex(self.codes)
+
+    @classmethod
+    def fromPermutationIndex(cls, index: int) -> 'Deck':
+        return cls.fromCodes(permutationFromIndex(index))
 
     def size(self) -> int:
-        return len(self.cards)
+        return len(self.codes)
 
     def peek(self, pos: int = 0) -> Card | None:
         """ take a look at the card at pos.  POS 0 is the first card, POS -1 is the last card"""
         if pos < 0:
-            pos = len(self.cards) + pos
+            pos = len(self.codes) + pos
         try:
-            return self.cards[pos]
+            return CARDS[self.codes[pos]]
         except IndexError:
             return None
 
     def getOne(self, pos: int = 0) -> Card | None:
         """ Remove card from pos.  POS 0 is top POS -1 is last card"""
         if pos < 0:
-            pos = len(self.cards) + pos
+            pos = len(self.codes) + pos
 
         try:
-            return self.cards.pop(pos)
+            code = self.codes.pop(pos)
         except IndexError:
             return None
 
+        if self.journal is not None or self.keys is not None:
+            if pos < 0:
+                pos = len(self.codes) + pos + 1
+            if self.journal is not None:
+                self.journal.append((self, pos, bytes((code,)), 0))
+            if self.keys is not None:
+                self._hashSplice(pos, (code,), b'', len(self.codes) + 1)
+        return CARDS[code]
+
+    def takeCodes(self, count: int) -> bytes:
+        """ remove up to count codes from the top in one step. They are returned top first"""
+        if count <= 0:
+            return b''
+        taken = bytes(self.codes[:count])
+        if not taken:
+            return taken
+
+        del self.codes[:len(taken)]  # O(1), a bytearray drops its head without moving the rest
+        if self.journal is not None:
+            self.journal.append((self, 0, taken, 0))
+        if self.keys is not None:
+            self._hashSplice(0, taken, b'', len(self.codes) + len(taken))
+        return taken
+
+    def giveCodes(self, codes) -> None:
+        """ put codes on the top one after the other in one step, so the last one ends up on top"""
+        if not codes:
+            return
+        size = len(self.codes)
+        added = bytes(reversed(codes))
+        self.codes[0:0] = added
+        if self.journal is not None:
+            self.journal.append((self, 0, b'', len(added)))
+        if self.keys is not None:
+            self._hashSplice(0, b'', added, size)
+
+    def setCodes(self, codes) -> None:
+        """ replace every code in one step"""
+        old = bytes(self.codes)
+        if self.journal is not None:
+            self.journal.append((self, 0, old, len(codes)))
+        self.splice(0, len(old), codes)
+
+    def take(self, count: int) -> list[Card]:
+        """ same as getManyCount(count, pos=0) """
+        return [CARDS[c] for c in self.takeCodes(count)]
+
+    def give(self, cards: list[Card]) -> None:
+        """ same as putOne(card, pos=0) for each card"""
+        self.giveCodes(bytes(c.code for c in cards))
+
     def getManyCount(self, count: int = 1, pos: int = 0) -> list[Card]:
         """ Remove card from pos 0 is top"""
         result: list[Card] = []
@@ -114,6 +311,9 @@ class Deck:
         if count < 0:
             return result
 
+        if pos == 0:
+            return self.take(count)
+
         for i in range(count):
             card = self.getOne(pos=pos)
             if card is not None:
@@ -124,13 +324,20 @@ class Deck:
         result = []
 
         if end < 0:
-            end = len(self.cards) + end
+            end = len(self.codes) + end
         elif end <= start:
             return result
 
-        result = [self.cards[i] for i in range(start, end+1)]
+        removed = self.codes[start:end+1]
+        result = [CARDS[c] for c in removed]
 
-        del self.cards[start:end+1]
+        del self.codes[start:end+1]
+
+        if removed:
+            if self.journal is not None:
+                self.journal.append((self, start, bytes(removed), 0))
+            if self.keys is not None:
+                self._hashSplice(start, removed, b'', len(self.codes) + len(removed))
 
         return result
 
@@ -139,15 +346,31 @@ class Deck:
         if card is None:
             return
 
+        size = len(self.codes)
         if pos < 0:
-            pos = len(self.cards) + pos
+            pos = size + pos
+
+        self.codes.insert(pos, card.code)
 
-        self.cards.insert(pos, card)
+        if self.journal is not None or self.keys is not None:
+            # insert() clamps pos the same way a list does
+            if pos < 0:
+                pos = max(0, size + pos)
+            pos = min(pos, size)
+            if self.journal is not None:
+                self.journal.append((self, pos, b'', 1))
+            if self.keys is not None:
+                self._hashSplice(pos, b'', (card.code,), size)
 
     def appendOne(self, card) -> None:
         if card is None:
             return
-        self.cards.append(card)
+        size = len(self.codes)
+        if self.journal is not None:
+            self.journal.append((self, size, b'', 1))
+        self.codes.append(card.code)
+        if self.keys is not None:
+            self._hashSplice(size, b'', (card.code,), size)
 
     def appendMany(self, cards: list[Card]) -> None:
         if cards is None:
@@ -155,7 +378,12 @@ class Deck:
         if not isinstance(cards, list) or len(cards) == 0:
             return
 
-        self.cards.extend(cards)
+        size = len(self.codes)
+        if self.journal is not None:
+            self.journal.append((self, size, b'', len(cards)))
+        self.codes.extend([c.code for c in cards])
+        if self.keys is not None:
+            self._hashSplice(size, b'', self.codes[size:], size)
 
 
 """
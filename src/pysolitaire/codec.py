@@ -0,0 +1,156 @@
+from typing import Iterable, Iterator
+
+from card_model import CardSuit, Deck
+from rules import RuleSet
+from solitaire import Action, BuildStack, GameState, SuitStack
+
+# Compact binary form of a GameState and of a list of Actions.
+#
+# GameState, version 1:
+#   0  version
+#   1  rules.draw
+#   2  rules.passes, 0 for unlimited
+#   3  rules.columns << 4 | thoughtful << 1 | vegas
+#   4  recycles
+#   5  SuitStack heights, a nibble each by suit index (CardSuit.value - 1)
+#   7  per BuildStack one byte: hidden size << 4 | visible size
+#      talon size, deal deck size
+#      the codes of the cards not on a SuitStack, 6 bits each, big endian: per BuildStack hidden then visible,
+#      then the talon and the deal deck.  Every Deck top first like Deck.codes
+# A standard deal is 55 bytes.  A SuitStack holds A up to its height so its cards are not stored.
+#
+# Action: one byte, source << 4 | destination, see ACTION_IDS.  An Action with deals is two bytes:
+# 0xF0 | destination, deals.
+
+VERSION = 1
+HEADER = 7
+
+ACTION_IDS = "TXcdhs123456789"  # index = id in the byte
+# executeInput takes either case
+ACTION_ID = {**{k.lower(): i for i, k in enumerate(ACTION_IDS)}, **{k.upper(): i for i, k in enumerate(ACTION_IDS)}}
+NO_DEST = 0x0F   # destination of a deal
+MACRO = 0x0F     # source of an Action with deals, the deals follow in the next byte
+SUITS = {"c": CardSuit.CLUBS, "d": CardSuit.DIAMONDS, "h": CardSuit.HEARTS, "s": CardSuit.SPADES}
+
+
+def encodeState(state: GameState) -> bytes:
+    rules = state.rules
+    heights = [0] * 4
+    for s in state.suitstacks.values():
+        heights[s.suit_index] = s.deck.size()
+
+    out = bytearray((VERSION, rules.draw, rules.passes or 0,
+                     rules.columns << 4 | rules.thoughtful << 1 | rules.vegas, state.recycles,
+                     heights[0] << 4 | heights[1], heights[2] << 4 | heights[3]))
+    codes = bytearray()
+    for b in state.buildstacks:
+        if b.hidden_deck.size() > 15 or b.visible_deck.size() > 15:
+            raise ValueError("a BuildStack with more than 15 hidden or visible cards cannot be encoded")
+        out.append(b.hidden_deck.size() << 4 | b.visible_deck.size())
+        codes += b.hidden_deck.codes
+        codes += b.visible_deck.codes
+    out.append(state.talon.size())
+    out.append(state.deal_deck.size())
+    codes += state.talon.codes
+    codes += state.deal_deck.codes
+
+    packed = 0
+    for code in codes:
+        packed = packed << 6 | code
+    size = (len(codes) * 6 + 7) // 8
+    out += (packed << (size * 8 - len(codes) * 6)).to_bytes(size, "big")
+    return bytes(out)
+
+
+def stateSize(data) -> int:
+    """ bytes taken by the encoded GameState at the start of data"""
+    view = memoryview(data)
+    columns = view[3] >> 4
+    heights = view[5] >> 4, view[5] & 15, view[6] >> 4, view[6] & 15
+    return HEADER + columns + 2 + ((52 - sum(heights)) * 6 + 7) // 8
+
+
+def decodeState(data) -> GameState:
+    """ data is bytes, bytearray or a memoryview, which is read in place.  Only the first stateSize(data)
+        bytes are used, so a record of a larger buffer can be passed"""
+    view = memoryview(data)
+    if view[0] != VERSION:
+        raise ValueError(f"unknown GameState encoding version {view[0]}")
+
+    columns = view[3] >> 4
+    rules = RuleSet(draw=view[1], passes=view[2] or None, columns=columns,
+                    thoughtful=bool(view[3] & 2), vegas=bool(view[3] & 1))
+    heights = view[5] >> 4, view[5] & 15, view[6] >> 4, view[6] & 15
+    sizes = view[HEADER:HEADER + columns + 2]
+
+    count = 52 - sum(heights)
+    start = HEADER + columns + 2
+    size = (count * 6 + 7) // 8
+    packed = int.from_bytes(view[start:start + size], "big") >> (size * 8 - count * 6)
+    codes = bytearray(count)
+    for i in range(count - 1, -1, -1):
+        codes[i] = packed & 63
+        packed >>= 6
+
+    suitstacks = {}
+    for key, suit in SUITS.items():
+        stack = suitstacks[key] = SuitStack(suit=suit)
+        base = stack.suit_index * 13
+        stack.deck.codes.extend(range(base, base + heights[stack.suit_index]))
+
+    pos = 0
+    buildstacks = []
+    for i in range(columns):
+        b = BuildStack()
+        hidden, visible = sizes[i] >> 4, sizes[i] & 15
+        b.hidden_deck.codes += codes[pos:pos + hidden]
+        pos += hidden
+        b.visible_deck.codes += codes[pos:pos + visible]
+        pos += visible
+        buildstacks.append(b)
+    talon = Deck.fromCodes(codes[pos:pos + sizes[columns]])
+    pos += sizes[columns]
+    deal_deck = Deck.fromCodes(codes[pos:pos + sizes[columns + 1]])
+
+    return GameState(suitstacks=suitstacks, buildstacks=buildstacks, talon=talon, deal_deck=deal_deck,
+                     rules=rules, recycles=view[4])
+
+
+def iterStates(data) -> Iterator[GameState]:
+    """ the GameStates encoded one after the other in data"""
+    view = memoryview(data)
+    pos = 0
+    while pos < len(view):
+        record = view[pos:]
+        yield decodeState(record)
+        pos += stateSize(record)
+
+
+def encodeActions(actions: Iterable[Action]) -> bytes:
+    out = bytearray()
+    for action in actions:
+        dest = ACTION_ID[action.dest] if action.dest else NO_DEST
+        if action.deals:
+            if not 0 < action.deals < 256:
+                raise ValueError(f"cannot encode {action.deals} deals")
+            out.append(MACRO << 4 | dest)
+            out.append(action.deals)
+        else:
+            out.append(ACTION_ID[action.src] << 4 | dest)
+    return bytes(out)
+
+
+def decodeActions(data) -> Iterator[Action]:
+    """ the Actions of encodeActions.  Only the tokens are stored so src_cards is empty, enough for applyAction"""
+    view = memoryview(data)
+    pos = 0
+    while pos < len(view):
+        source, dest = view[pos] >> 4, view[pos] & 15
+        deals = 0
+        if source == MACRO:
+            source = 0  # always the talon
+            deals = view[pos + 1]
+            pos += 1
+        pos += 1
+        yield Action(src=ACTION_IDS[source], dest="" if dest == NO_DEST else ACTION_IDS[dest], src_cards=[],
+                     deals=deals)
@@ -0,0 +1,106 @@
+from card_model import CARD_RANK, CARD_RED, CARD_SUIT, CARDS
+from solitaire import ALL_STACKS, Action, Game, GameState, executeInput
+
+# The end of a game.  With no hidden cards and nothing left to deal every BuildStack is a run down in
+# alternating colours, so its top is its lowest card.  The lowest card left on the table is then always the
+# next card of its SuitStack, and playing the tops in turn wins: the position is won by force.
+#
+# A card is safe to put on its SuitStack when no card left on the table can need it as a place to go: its rank
+# is at most 2 above the SuitStacks of both suits of the other colour (their cards one rank lower can go home
+# instead) and at most 3 above the other suit of its colour (whose cards those need).  Search plays safe moves
+# without branching.
+
+SUIT_RED = tuple(CARD_RED[suit * 13] for suit in range(4))  # by suit index (CardSuit.value - 1)
+
+
+def heights(state: GameState) -> list[int]:
+    """ cards on the SuitStack of each suit index"""
+    result = [0] * 4
+    for s in state.suitstacks.values():
+        result[s.suit_index] = len(s.deck.codes)
+    return result
+
+
+def isSafeFoundation(code: int, heights: list[int]) -> bool:
+    """ can putting code on its SuitStack never cost a win.  heights as heights() returns"""
+    rank = CARD_RANK[code]
+    if rank <= 2:
+        return True
+    red = CARD_RED[code]
+    own = CARD_SUIT[code]
+    return all(heights[suit] + (2 if SUIT_RED[suit] != red else 3) >= rank for suit in range(4) if suit != own)
+
+
+def playSafe(game: Game) -> list[Action]:
+    """ play safe moves from the BuildStacks to the SuitStacks until there are none.  Returns them in order.
+        Talon cards are left: Game.deal needs draw cards to turn over, so they also keep the deal going"""
+    state = game.state()
+    sids = {s.suit_index: k for k, s in state.suitstacks.items()}
+    height = heights(state)
+    played = []
+    moved = True
+    while moved:
+        moved = False
+        for i, b in enumerate(state.buildstacks):
+            codes = b.visible_deck.codes
+            if not codes:
+                continue
+            top = codes[-1]
+            suit = CARD_SUIT[top]
+            if height[suit] + 1 == CARD_RANK[top] and isSafeFoundation(top, height):
+                action = Action(src=str(i + 1), dest=sids[suit], src_cards=[CARDS[top]])
+                executeInput(game, firstToken=action.src, secondToken=action.dest)
+                height[suit] += 1
+                played.append(action)
+                moved = True
+    return played
+
+
+def isWonByForce(state: GameState) -> bool:
+    """ no hidden cards and nothing on the talon or left to deal.  O(cards)"""
+    if state.talon.codes or state.deal_deck.codes:
+        return False
+    return not any(b.hidden_deck.codes for b in state.buildstacks)
+
+
+def forcedWin(state: GameState) -> list[Action]:
+    """ the moves that play every card left to the SuitStacks of a position isWonByForce.  The state is not
+        changed.  Each BuildStack is one run, so this is one pass per card in the worst case"""
+    sids = {s.suit_index: k for k, s in state.suitstacks.items()}
+    height = heights(state)
+    columns = [list(b.visible_deck.codes) for b in state.buildstacks]
+    actions = []
+    moved = True
+    while moved:
+        moved = False
+        for i, column in enumerate(columns):
+            while column and height[CARD_SUIT[column[-1]]] + 1 == CARD_RANK[column[-1]]:
+                code = column.pop()
+                suit = CARD_SUIT[code]
+                height[suit] += 1
+                actions.append(Action(src=str(i + 1), dest=sids[suit], src_cards=[CARDS[code]]))
+                moved = True
+    return actions
+
+
+def autoComplete(game: Game) -> int:
+    """ when the game is won by force put every card on its SuitStack in one step per stack.  Returns the cards
+        moved, 0 when the position is not won by force"""
+    state = game.state()
+    if not isWonByForce(state):
+        return 0
+    if game.recorder is not None and not game.probing:
+        # recorded as the moves they stand for, so a replay plays them one by one
+        for action in forcedWin(state):
+            game.recorder(game, action.src, action.dest)
+    moved = 0
+    for b in state.buildstacks:
+        if b.visible_deck.codes:
+            moved += len(b.visible_deck.codes)
+            b.visible_deck.setCodes(b'')
+    for s in state.suitstacks.values():
+        base = s.suit_index * 13
+        s.deck.setCodes(bytes(range(base, base + 13)))
+    if game.listeners:
+        game.notify(ALL_STACKS)
+    return moved
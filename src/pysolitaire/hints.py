@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+import asyncio
+import heapq
+import itertools
+import time
+
+from policy import WON, Weights, evaluate
+from solitaire import Action, Game, applyAction
+from solver import orderedActions
+
+# Hints for the player.  HintEngine keeps the tree of moves it looked at between turns: when the player moves,
+# the subtree under that move becomes the new root and the rest is dropped.  deepen() grows the tree best first
+# (the unexpanded position with the highest evaluation next) for a time budget and every node holds the best
+# evaluation found below it, so hints() answers from the tree straight away.  Search runs on a copy of the game,
+# the game being played is only read.
+
+# hints are ranked on cards on the SuitStacks, less hidden cards and empty BuildStacks; the talon is left out
+WEIGHTS = Weights(foundation=10.0, hidden=5.0, empty=2.0, stock=0.0, access=0.0)
+
+
+@dataclass
+class HintNode:
+    action: Action | None  # the move from the parent, None for the root
+    key: int               # GameState.zobrist() after the move
+    value: float           # evaluate() of the position
+    best: float            # the best value in the subtree
+    children: list['HintNode'] | None = None  # None until expanded
+
+    def ranked(self) -> list['HintNode']:
+        return sorted(self.children or [], key=lambda n: -n.best)
+
+
+class HintEngine:
+
+    def __init__(self, game: Game, macros: bool = False, max_positions: int = 200_000):
+        self.game = game
+        self.macros = macros
+        self.max_positions = max_positions  # the tree stops growing at this size
+        self.search = Game(game_state=game.state().clone())
+        self.search.probing = True
+        self.root: HintNode | None = None
+        self.position = b''  # GameState.to_bytes() of the root
+        # unexpanded nodes with their path from the root: (-value, order, node, path)
+        self.frontier: list[tuple[float, int, HintNode, list[HintNode]]] = []
+        self._order = itertools.count()
+        self.keys: set[int] = set()  # every position in the tree
+        self.nodes = 0  # expanded since the engine was made
+        self.sync()
+
+    def sync(self) -> bool:
+        """ follow the game being played.  True when the tree, or part of it, was kept"""
+        # the position itself and not its Zobrist hash: that does not tell columns apart, a King moved from one
+        # column to an empty one has the same key
+        position = self.game.state().to_bytes()
+        if self.root is not None and self.position == position:
+            return True
+
+        key = self.game.state().zobrist()
+        subtree = None
+        if self.root is not None and self.root.children:
+            subtree = self._child(position, key)
+
+        self.search.release()
+        self.search.game_state.restore(self.game.state().snapshot())
+
+        if subtree is None:
+            value = evaluate(self.search, WEIGHTS)
+            self.root = HintNode(action=None, key=key, value=value, best=value)
+        else:
+            subtree.action = None
+            self.root = subtree
+        self.position = position
+
+        # the frontier and the keys of what is left
+        self.frontier.clear()
+        self.keys = set()
+        stack = [(self.root, [])]
+        while stack:
+            node, path = stack.pop()
+            self.keys.add(node.key)
+            if node.children is None:
+                self._push(node, path)
+            else:
+                stack.extend((c, path + [c]) for c in node.children)
+        return subtree is not None
+
+    def _child(self, position: bytes, key: int) -> HintNode | None:
+        """ the child of the root whose move leads to position.  The Zobrist hash does not tell columns apart,
+            the same cards moved to another column have the same key, so the position itself is compared"""
+        game = self.search
+        mark = game.mark()
+        try:
+            for child in self.root.children:
+                if child.key != key:
+                    continue
+                applyAction(game, child.action)
+                same = game.state().to_bytes() == position
+                game.undo(mark)
+                if same:
+                    return child
+            return None
+        finally:
+            game.release()
+
+    def _push(self, node: HintNode, path: list[HintNode]) -> None:
+        heapq.heappush(self.frontier, (-node.value, next(self._order), node, path))
+
+    def expand(self, node: HintNode, path: list[HintNode]) -> None:
+        game = self.search
+        mark = game.mark()
+        for step in path:
+            applyAction(game, step.action)
+
+        node.children = []
+        if not game.state().isWon():
+            here = game.mark()
+            for action in orderedActions(game, self.macros, prune=True, last=path[-1].action if path else None):
+                applyAction(game, action)
+                state = game.state()
+                key = state.zobrist()
+                if key not in self.keys:
+                    self.keys.add(key)
+                    value = evaluate(game, WEIGHTS)
+                    child = HintNode(action=action, key=key, value=value, best=value)
+                    node.children.append(child)
+                    self._push(child, path + [child])
+                game.undo(here)
+        game.undo(mark)
+        self.nodes += 1
+
+        # back the best value up to the root
+        chain = [self.root] + path
+        for n in reversed(chain):
+            best = max([n.value] + [c.best for c in n.children or []])
+            if best == n.best and n is not node:
+                break
+            n.best = best
+
+    def deepen(self, seconds: float) -> int:
+        """ expand nodes best first for about seconds.  Returns the nodes expanded"""
+        self.sync()
+        deadline = time.perf_counter() + seconds
+        count = 0
+        while self.frontier and len(self.keys) < self.max_positions and (count == 0 or time.perf_counter() < deadline):
+            _, _, node, path = heapq.heappop(self.frontier)
+            if node.children is not None:
+                continue  # hints() expanded it
+            self.expand(node, path)
+            count += 1
+        return count
+
+    async def think(self, seconds: float, slice_seconds: float = 0.005) -> int:
+        """ deepen() in slices, giving the event loop (a UI) back between them"""
+        deadline = time.perf_counter() + seconds
+        count = 0
+        while self.frontier and len(self.keys) < self.max_positions and time.perf_counter() < deadline:
+            count += self.deepen(min(slice_seconds, deadline - time.perf_counter()))
+            await asyncio.sleep(0)
+        return count
+
+    def hints(self, count: int = 3) -> list[tuple[Action, float]]:
+        """ the best moves from the current position with the best evaluation found after each, best first"""
+        self.sync()
+        if self.root.children is None:
+            self.expand(self.root, [])
+        return [(n.action, n.best) for n in self.root.ranked()[:count]]
+
+    def best(self) -> Action | None:
+        hints = self.hints(1)
+        return hints[0][0] if hints else None
@@ -0,0 +1,268 @@
+from multiprocessing import shared_memory
+from typing import Iterable
+import multiprocessing
+import queue
+import time
+
+from codec import decodeActions, encodeActions
+from endgame import forcedWin, isWonByForce
+from solitaire import Game, GameState, applyAction
+from solver import SolveResult, expandActions, orderedActions
+
+# solve() spread over worker processes.  The work is a queue of tasks, each a position (codec bytes) and the
+# moves that led to it from the root.  The root moves are the first tasks.  A worker searches its task depth first
+# like solver.solve, and when other workers are waiting for work it gives away the untried moves closest to the
+# root of its search as new tasks.
+#
+# Positions already searched are kept in a transposition table in shared memory that every worker reads and
+# writes without locks: a slot holds a Zobrist hash, and a lost or overwritten entry only means a position is
+# searched twice.  Each worker also keeps its own set, so its search always ends.
+# The first worker to find a win sets an Event and every worker stops.
+
+PROBES = 4
+CHECK_EVERY = 256   # nodes between looks at the shared state
+SPLIT_DEPTH = 2     # the root is split until there are this many levels of tasks or enough tasks
+
+
+def _seen(table: memoryview, mask: int, key: int) -> bool:
+    """ True when key is in the table, otherwise it is added"""
+    key = key or 1  # 0 is an empty slot
+    start = key & mask
+    for probe in range(PROBES):
+        i = (start + probe) & mask
+        slot = table[i]
+        if slot == key:
+            return True
+        if slot == 0:
+            table[i] = key
+            return False
+    table[start] = key
+    return False
+
+
+class _Shared:
+    """ what the main process and the workers share"""
+
+    def __init__(self, context, table_bits: int):
+        self.memory = shared_memory.SharedMemory(create=True, size=8 << table_bits)
+        self.memory.buf[:] = bytes(8 << table_bits)
+        self.table_bits = table_bits
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.found = context.Event()
+        self.pending = context.Value('q', 0)   # tasks queued or being searched
+        self.idle = context.Value('i', 0)      # workers waiting for a task
+        self.nodes = context.Value('q', 0)
+
+    def put(self, task: tuple[bytes, bytes]) -> None:
+        with self.pending.get_lock():
+            self.pending.value += 1
+        self.tasks.put(task)
+
+    def done(self) -> None:
+        with self.pending.get_lock():
+            self.pending.value -= 1
+
+    def close(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+
+class _Worker:
+
+    def __init__(self, shared: _Shared, max_nodes: int, deadline: float | None, macros: bool):
+        self.shared = shared
+        self.memory = shared_memory.SharedMemory(name=shared.memory.name)
+        self.table = self.memory.buf.cast('Q')
+        self.mask = (1 << shared.table_bits) - 1
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.macros = macros
+        self.seen: set[int] = set()
+        self.nodes = 0  # not yet added to shared.nodes
+
+    def run(self) -> None:
+        shared = self.shared
+        try:
+            while not shared.found.is_set() and shared.pending.value > 0:
+                with shared.idle.get_lock():
+                    shared.idle.value += 1
+                try:
+                    task = shared.tasks.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                finally:
+                    with shared.idle.get_lock():
+                        shared.idle.value -= 1
+                try:
+                    self.search(*task)
+                finally:
+                    shared.done()
+        finally:
+            with shared.nodes.get_lock():
+                shared.nodes.value += self.nodes
+            self.table.release()
+            self.memory.close()
+
+    def stop(self) -> bool:
+        """ add the nodes to the shared count, True when the search has to end"""
+        shared = self.shared
+        with shared.nodes.get_lock():
+            shared.nodes.value += self.nodes
+            total = shared.nodes.value
+        self.nodes = 0
+        return (shared.found.is_set() or total >= self.max_nodes
+                or (self.deadline is not None and time.perf_counter() > self.deadline))
+
+    def search(self, data: bytes, moves: bytes) -> None:
+        root = GameState.from_bytes(data)
+        if isWonByForce(root):
+            self.shared.results.put(moves + encodeActions(forcedWin(root)))
+            self.shared.found.set()
+            return
+        game = Game(game_state=root)
+        key = root.zobrist()
+        if key in self.seen or _seen(self.table, self.mask, key):
+            return
+        self.seen.add(key)
+
+        path = []
+        frames = [(game.mark(), orderedActions(game, self.macros, prune=True))]
+        count = 0
+
+        while frames:
+            mark, actions = frames[-1]
+            if not actions:
+                frames.pop()
+                if path:
+                    path.pop()
+                continue
+
+            count += 1
+            if count % CHECK_EVERY == 0:
+                self.nodes += CHECK_EVERY
+                if self.stop():
+                    return
+                if self.shared.idle.value > 0:
+                    self.split(data, moves, frames, path)
+                    continue
+
+            action = actions.pop(0)
+            game.undo(mark)
+            applyAction(game, action)
+
+            current = game.state()
+            if isWonByForce(current):
+                self.nodes += count % CHECK_EVERY
+                self.shared.results.put(moves + encodeActions(expandActions(path + [action]) + forcedWin(current)))
+                self.shared.found.set()
+                return
+
+            key = current.zobrist()
+            if key in self.seen or _seen(self.table, self.mask, key):
+                continue
+            self.seen.add(key)
+
+            path.append(action)
+            frames.append((game.mark(), orderedActions(game, self.macros, prune=True, last=action)))
+        self.nodes += count % CHECK_EVERY
+
+    def split(self, data: bytes, moves: bytes, frames: list, path: list) -> None:
+        """ give away the untried moves of the frame closest to the root that has any"""
+        for depth, (_, actions) in enumerate(frames):
+            if actions:
+                break
+        else:
+            return
+
+        game = Game(game_state=GameState.from_bytes(data))
+        for action in path[:depth]:
+            applyAction(game, action)
+        mark = game.mark()
+        prefix = path[:depth]
+        for action in actions:
+            applyAction(game, action)
+            self.shared.put((game.state().to_bytes(), moves + encodeActions(expandActions(prefix + [action]))))
+            game.undo(mark)
+        actions.clear()
+
+
+def _work(shared: _Shared, max_nodes: int, deadline: float | None, macros: bool) -> None:
+    _Worker(shared, max_nodes, deadline, macros).run()
+
+
+def _rootTasks(state: GameState, workers: int, macros: bool) -> list[tuple[bytes, bytes]]:
+    """ the positions a few moves from state, as tasks"""
+    tasks = [(state.to_bytes(), b'')]
+    for _ in range(SPLIT_DEPTH):
+        if len(tasks) >= workers * 4:
+            break
+        children = []
+        for data, moves in tasks:
+            game = Game(game_state=GameState.from_bytes(data))
+            mark = game.mark()
+            for action in orderedActions(game, macros, prune=True):
+                applyAction(game, action)
+                children.append((game.state().to_bytes(), moves + encodeActions(expandActions([action]))))
+                game.undo(mark)
+        if not children:
+            break
+        tasks = children
+    return tasks
+
+
+def solveParallel(state: GameState, *, workers: int | None = None, max_nodes: int = 1_000_000,
+                  max_seconds: float | None = None, macros: bool = False, table_bits: int = 20) -> SolveResult:
+    """ solver.solve over worker processes.  The transposition table has 2**table_bits slots of 8 bytes.
+        The actions of a win only carry src and dest (see codec.decodeActions)"""
+    started = time.perf_counter()
+    if isWonByForce(state):
+        return SolveResult(winnable=True, actions=forcedWin(state), elapsed=time.perf_counter() - started)
+    workers = workers or multiprocessing.cpu_count()
+    deadline = None if max_seconds is None else started + max_seconds
+
+    context = multiprocessing.get_context()
+    shared = _Shared(context, table_bits)
+    try:
+        for task in _rootTasks(state, workers, macros):
+            shared.put(task)
+
+        processes = [context.Process(target=_work, args=(shared, max_nodes, deadline, macros), daemon=True)
+                     for _ in range(workers)]
+        for p in processes:
+            p.start()
+
+        win = None
+        while win is None and any(p.is_alive() for p in processes):
+            try:
+                win = shared.results.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        shared.found.set()  # stop the others
+        for p in processes:
+            p.join()
+        if win is None:
+            try:
+                win = shared.results.get_nowait()
+            except queue.Empty:
+                pass
+
+        nodes = shared.nodes.value
+        if win is not None:
+            return SolveResult(winnable=True, actions=list(decodeActions(win)), nodes=nodes,
+                               elapsed=time.perf_counter() - started)
+        out_of_budget = nodes >= max_nodes or (deadline is not None and time.perf_counter() > deadline)
+        finished = shared.pending.value == 0
+        return SolveResult(winnable=None if out_of_budget or not finished else False, nodes=nodes,
+                           elapsed=time.perf_counter() - started)
+    finally:
+        shared.close()
+
+
+def speedupReport(state: GameState, worker_counts: Iterable[int], **kwargs) -> list[tuple[int, float, float, int]]:
+    """ (workers, seconds, speedup over the first worker count, nodes) solving the same state"""
+    report = []
+    for workers in worker_counts:
+        result = solveParallel(state, workers=workers, **kwargs)
+        report.append((workers, result.elapsed, report[0][1] / result.elapsed if report else 1.0, result.nodes))
+    return report
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+import cProfile
+import functools
+import importlib
+import inspect
+import sys
+import time
+
+# Opt in counters for the engine.  enable() swaps each function of TARGETS for a wrapper that counts calls,
+# time and the change in allocated memory blocks, and disable() puts the originals back, so when profiling is
+# off the engine runs its own code with nothing in between.
+#
+#   profiling.enable()
+#   ... play / solve ...
+#   print(profiling.summary())
+#
+# profile() also runs cProfile and writes its stats, which snakeviz, flameprof or gprof2dot turn into a flame graph.
+
+TARGETS = [
+    ("solitaire", "Game.start"),
+    ("solitaire", "Game.deal"),
+    ("solitaire", "computeOptions"),
+    ("solitaire", "MoveGenerator.moves"),
+    ("solitaire", "executeInput"),
+    ("solitaire", "GameState.clone"),
+    ("solitaire", "GameState.snapshot"),
+    ("solitaire", "GameState.restore"),
+    ("solitaire", "GameState.zobrist"),
+    ("rules", "canStack"),
+    ("rules", "canFound"),
+    ("card_model", "Deck.splice"),
+    ("card_model", "Deck.shuffle"),
+    ("card_model", "Deck.getOne"),
+    ("card_model", "Deck.putOne"),
+    ("card_model", "Deck.takeCodes"),
+    ("card_model", "Deck.giveCodes"),
+    ("card_model", "Deck.getManyCount"),
+    ("card_model", "Deck.getManySlice"),
+    ("card_model", "Deck.appendOne"),
+    ("card_model", "Deck.appendMany"),
+]
+
+
+@dataclass
+class Counter:
+    calls: int = 0
+    seconds: float = 0.0  # includes the time of the functions it calls
+    net_blocks: int = 0   # memory blocks allocated and not freed by the time the call returned, not every
+                          # allocation it made: sys.getallocatedblocks() after the call less before
+
+
+counters: dict[str, Counter] = {}
+_originals: dict[tuple[object, str], object] = {}  # (owner, attribute) -> original
+
+
+def _wrap(name: str, func, net_blocks: bool):
+    counter = counters.setdefault(name, Counter())
+    clock = time.perf_counter
+    blocks = sys.getallocatedblocks
+
+    if inspect.isgeneratorfunction(func):
+        # time spent producing each item, not the time the caller holds the generator
+        @functools.wraps(func)
+        def generator(*args, **kwargs):
+            counter.calls += 1
+            it = func(*args, **kwargs)
+            while True:
+                before = blocks() if net_blocks else 0
+                started = clock()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    counter.seconds += clock() - started
+                    if net_blocks:
+                        counter.net_blocks += blocks() - before
+                yield item
+        return generator
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        counter.calls += 1
+        before = blocks() if net_blocks else 0
+        started = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            counter.seconds += clock() - started
+            if net_blocks:
+                counter.net_blocks += blocks() - before
+    return wrapper
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+def enable(net_blocks: bool = False) -> None:
+    """ start counting.  net_blocks also counts the memory blocks left allocated, which costs a little more
+        per call"""
+    if enabled():
+        return
+    for module_name, path in TARGETS:
+        module = importlib.import_module(module_name)
+        owner_name, _, attribute = path.rpartition(".")
+        owner = getattr(module, owner_name) if owner_name else module
+        func = getattr(owner, attribute)
+        wrapper = _wrap(path, func, net_blocks)
+        _originals[(owner, attribute)] = func
+        setattr(owner, attribute, wrapper)
+
+        if not owner_name:
+            # functions other modules imported by name, e.g. "from solitaire import executeInput"
+            for other in list(sys.modules.values()):
+                if other is not module and getattr(other, attribute, None) is func:
+                    _originals[(other, attribute)] = func
+                    setattr(other, attribute, wrapper)
+
+
+def disable() -> None:
+    """ put the original functions back.  The counters are kept"""
+    for (owner, attribute), func in _originals.items():
+        setattr(owner, attribute, func)
+    _originals.clear()
+
+
+def reset() -> None:
+    counters.clear()
+
+
+def summary() -> str:
+    lines = [f"{'function':<28}{'calls':>12}{'seconds':>12}{'us/call':>10}{'net blocks':>12}"]
+    for name, c in sorted(counters.items(), key=lambda item: -item[1].seconds):
+        if c.calls:
+            lines.append(f"{name:<28}{c.calls:>12}{c.seconds:>12.4f}{c.seconds / c.calls * 1e6:>10.2f}{c.net_blocks:>12}")
+    return "\n".join(lines)
+
+
+@contextmanager
+def profile(path: str | None = None, net_blocks: bool = False) -> Iterator[cProfile.Profile]:
+    """ counters and cProfile for the body.  With path the cProfile stats are written there (pstats format)"""
+    reset()
+    enable(net_blocks)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        disable()
+        if path is not None:
+            profiler.dump_stats(path)
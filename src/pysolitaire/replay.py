@@ -0,0 +1,187 @@
+from dataclasses import dataclass, field
+from typing import Iterator
+import fcntl
+import os
+import struct
+
+from codec import ACTION_ID, ACTION_IDS, NO_DEST
+from solitaire import Game, GameState, executeInput
+
+# A log of every move played, to reproduce a game afterwards.  ReplayLog.attach(game) writes the position the
+# game is in (codec bytes, usually just after Game.start) and from then on each move through executeInput and
+# each deal is one byte, src << 4 | dest as in codec.encodeActions.  Moves are kept in memory and written in
+# batches, each game's moves of a batch as one record.  Moves made while Game.probing is set are not logged: the
+# policies set it while they try moves and take them back.  Game.autoComplete is logged as the moves it stands for.
+#
+# The file is a 16 byte header then records, little endian:
+#   START  0xFF  u4 game  i8 seed (-1 none)  u2 size  the codec state
+#   MOVES  0xFE  u4 game  u2 size  the move bytes
+#
+# Replayer rebuilds any position of a logged game.  It keeps the position every `every` moves as a checkpoint,
+# so seeking to move N replays fewer than `every` moves from the checkpoint before it.
+
+MAGIC = b"PYSOLLOG"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, reserved
+START = 0xFF
+MOVES = 0xFE
+START_RECORD = struct.Struct("<BIqH")
+MOVES_RECORD = struct.Struct("<BIH")
+MAX_MOVES = 0xFFFF  # a MOVES record holds at most this many
+
+# move byte -> (src, dest) tokens for executeInput
+TOKENS = [(ACTION_IDS[b >> 4] if b >> 4 < len(ACTION_IDS) else "",
+           ACTION_IDS[b & 15] if (b & 15) < len(ACTION_IDS) else "") for b in range(256)]
+
+
+class ReplayLog:
+    """ an append only log of the games attached to it.  Game ids are counted on from the ones in the file, so
+        only one ReplayLog may write a file at a time: it holds an exclusive lock on it until closed"""
+
+    def __init__(self, path: str, batch_bytes: int = 4096):
+        self.path = path
+        self.batch_bytes = batch_bytes
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self.fd)
+            raise BlockingIOError(f"{path} is being written by another ReplayLog") from None
+        if os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, HEADER.pack(MAGIC, VERSION, 0))
+            self.next_id = 1
+        else:
+            self.next_id = max(readLog(path), default=0) + 1
+        self.starts = bytearray()  # START records not written yet
+        self.moves: dict[int, bytearray] = {}  # game -> moves not written yet
+        self.pending = 0
+
+    def attach(self, game: Game, seed: int | None = None) -> int:
+        """ log game from its current position on.  Returns its id in the log"""
+        gid = self.next_id
+        self.next_id += 1
+        data = game.state().to_bytes()
+        self.starts += START_RECORD.pack(START, gid, -1 if seed is None else seed, len(data)) + data
+        self.pending += len(data)
+
+        moves = self.moves.setdefault(gid, bytearray())
+
+        def record(game: Game, src: str, dest: str | None) -> None:
+            source, destination = ACTION_ID.get(src), ACTION_ID.get(dest) if dest else NO_DEST
+            if source is None or destination is None:
+                return  # not a move, e.g. E
+            moves.append(source << 4 | destination)
+            self.pending += 1
+            if self.pending >= self.batch_bytes or len(moves) >= MAX_MOVES:
+                self.flush()
+
+        game.recorder = record
+        return gid
+
+    def detach(self, game: Game, gid: int) -> None:
+        """ stop logging game, gid is its id from attach().  What is left of its moves is written"""
+        game.recorder = None
+        if self.moves.get(gid):
+            self.flush()
+        self.moves.pop(gid, None)
+
+    def flush(self) -> None:
+        """ write what was logged since the last flush in one write"""
+        out = self.starts
+        for gid, moves in self.moves.items():
+            if moves:
+                out += MOVES_RECORD.pack(MOVES, gid, len(moves)) + moves
+                moves.clear()
+        if out:
+            os.write(self.fd, out)
+        self.starts = bytearray()
+        self.pending = 0
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            self.flush()
+            os.close(self.fd)  # and with it the lock
+            self.fd = -1
+
+    def __enter__(self) -> 'ReplayLog':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class LoggedGame:
+    id: int
+    seed: int | None
+    start: bytes  # codec state
+    moves: bytearray = field(default_factory=bytearray)
+
+
+def iterRecords(path: str) -> Iterator[tuple[int, int, int | None, bytes]]:
+    """ (tag, game, seed, data) of each record, seed is None for MOVES records"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} replay log")
+
+    view = memoryview(data)
+    pos = HEADER.size
+    while pos < len(view):
+        if view[pos] == START:
+            _, gid, seed, size = START_RECORD.unpack_from(view, pos)
+            pos += START_RECORD.size
+            yield START, gid, None if seed < 0 else seed, bytes(view[pos:pos + size])
+        else:
+            _, gid, size = MOVES_RECORD.unpack_from(view, pos)
+            pos += MOVES_RECORD.size
+            yield MOVES, gid, None, bytes(view[pos:pos + size])
+        pos += size
+
+
+def readLog(path: str) -> dict[int, LoggedGame]:
+    """ the games of a log by id"""
+    games = {}
+    for tag, gid, seed, data in iterRecords(path):
+        if tag == START:
+            games[gid] = LoggedGame(id=gid, seed=seed, start=data)
+        else:
+            games[gid].moves += data
+    return games
+
+
+class Replayer:
+    """ the positions of one LoggedGame"""
+
+    def __init__(self, game: LoggedGame, every: int = 64):
+        self.moves = bytes(game.moves)
+        self.every = every
+        self.checkpoints = [game.start]  # codec state after 0, every, 2 * every ... moves, as far as seek got
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def seek(self, n: int) -> Game:
+        """ a Game in the position after the first n moves"""
+        if not 0 <= n <= len(self.moves):
+            raise IndexError(f"move {n} of {len(self.moves)}")
+        every = self.every
+        i = min(n // every, len(self.checkpoints) - 1)
+        game = Game(game_state=GameState.from_bytes(self.checkpoints[i]))
+        moves = self.moves
+        for pos in range(i * every, n):
+            src, dest = TOKENS[moves[pos]]
+            executeInput(game, firstToken=src, secondToken=dest or None)
+            if (pos + 1) % every == 0 and (pos + 1) // every == len(self.checkpoints):
+                self.checkpoints.append(game.state().to_bytes())
+        return game
+
+    def positions(self) -> Iterator[GameState]:
+        """ every position from the start to the end, in one pass.  The same GameState, changed in place"""
+        game = self.seek(0)
+        yield game.state()
+        for b in self.moves:
+            src, dest = TOKENS[b]
+            executeInput(game, firstToken=src, secondToken=dest or None)
+            yield game.state()
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+
+from card_model import CARD_COUNT, CARD_RANK, CARD_RED, CARD_SUIT
+
+# Rule checks on integer card codes (see card_model.CARDS).  These are what the Card based
+# BuildStack / SuitStack checks call, and what search code can call directly on Deck.codes.
+# Both rules are precomputed tables so a check is one lookup.
+
+EMPTY = -1  # destination code for an empty BuildStack
+KING = 13
+SUIT_HEIGHTS = 14  # a SuitStack holds 0 to 13 cards
+MAX_COLUMNS = 9  # 9 BuildStacks dealt 1 to 9 cards use 45 of the 52 cards
+
+
+def _canStack(source: int, destination: int) -> bool:
+    if destination == EMPTY:
+        return CARD_RANK[source] == KING
+    return CARD_RED[source] != CARD_RED[destination] and CARD_RANK[destination] - CARD_RANK[source] == 1
+
+
+# STACK_ON[source][destination]: 1 when source goes on destination in a BuildStack.  Each row has 53 entries,
+# the last one is for an empty BuildStack so that STACK_ON[source][EMPTY] works as is
+STACK_ON: tuple[bytes, ...] = tuple(
+    bytes(_canStack(s, d) for d in [*range(CARD_COUNT), EMPTY]) for s in range(CARD_COUNT))
+
+# FOUND_ON[source][suit * SUIT_HEIGHTS + height]: 1 when source goes on the SuitStack of suit holding height cards
+FOUND_ON: tuple[bytes, ...] = tuple(
+    bytes(CARD_SUIT[s] == suit and CARD_RANK[s] == height + 1 for suit in range(4) for height in range(SUIT_HEIGHTS))
+    for s in range(CARD_COUNT))
+
+
+def canStack(source: int, destination: int) -> bool:
+    """ can source be put on destination in a BuildStack. destination EMPTY is an empty BuildStack"""
+    return STACK_ON[source][destination] == 1
+
+
+def canFound(source: int, suit: int, height: int) -> bool:
+    """ can source be put on the SuitStack of suit (CardSuit.value - 1) that holds height cards"""
+    return FOUND_ON[source][suit * SUIT_HEIGHTS + height] == 1
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """ the variant being played.  Game reads it once when it is set up"""
+    draw: int = 3                # cards turned over by a deal
+    passes: int | None = None    # times through the deal deck, None is unlimited
+    columns: int = 7             # BuildStacks, dealt 1 to columns cards
+    thoughtful: bool = False     # hidden cards are shown to the player.  The moves are the same
+    vegas: bool = False          # Game.score() is in Vegas dollars
+
+    def __post_init__(self):
+        if self.draw < 1:
+            raise ValueError("draw must be at least 1")
+        if self.passes is not None and self.passes < 1:
+            raise ValueError("passes must be at least 1 or None")
+        if not 1 <= self.columns <= MAX_COLUMNS:
+            raise ValueError(f"columns must be between 1 and {MAX_COLUMNS}")
+
+
+STANDARD = RuleSet()
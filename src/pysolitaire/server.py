@@ -0,0 +1,319 @@
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import secrets
+import sys
+import time
+
+from codec import encodeActions
+from replay import ReplayLog
+from solitaire import Action, Game, applyAction
+
+# Many games in one process.  A client connects over TCP and sends one command per line, the server answers
+# each with one line:
+#
+#   new [seed]      start a game, answers "session <token>"
+#   resume <token>  continue a session after reconnecting
+#   <src>-<dest>    a move as typed in solitaire.main, e.g. T-c or 7-2.  X deals.  Answers "ok <cards on the
+#                   SuitStacks>" with " won" once the game is won, or "error illegal move"
+#   moves           the legal moves, space separated
+#   state           the position as hex of GameState.to_bytes()
+#   metrics         the server metrics as JSON
+#   quit
+#
+# A session is named by a random token, so one client cannot guess another's.  Sessions that get no command for
+# idle_seconds are evicted.  A session that would hold more than max_session_bytes (see Session.footprint) is ended.
+# With a replay log every game is logged, its id in the log is the session id.
+
+DEAL = Action(src="X", dest="", src_cards=[])
+
+
+@dataclass
+class Session:
+    id: int
+    token: str  # what the client names it by
+    game: Game
+    last_used: float
+    history: bytearray = field(default_factory=bytearray)  # codec.encodeActions of the moves played
+
+    def footprint(self) -> int:
+        """ bytes this session's buffers take, as sys.getsizeof counts them: the cards of its Decks, the undo
+            journal, the talon indexes Game keeps and the move log.  The fixed size objects around them are not
+            counted, they are the same for every session"""
+        game = self.game
+        size = sys.getsizeof(self.history) + sum(sys.getsizeof(d.codes) for d in game.state().decks())
+        if game.journal is not None:
+            size += sys.getsizeof(game.journal) + sum(sys.getsizeof(e) + (sys.getsizeof(e[2]) if len(e) == 4 else 0)
+                                                      for e in game.journal)
+        for index in game.talon_indexes.values():
+            size += sum(sys.getsizeof(talon) + sys.getsizeof(deal_deck) for talon, deal_deck, _ in index.positions)
+        return size
+
+
+class Metrics:
+    """ command counts and latencies.  Percentiles are over the last SAMPLES commands"""
+    SAMPLES = 10_000
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands = 0
+        self.errors = 0
+        self.evicted = 0
+        self.latencies: list[float] = []
+        self._next = 0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.commands += 1
+        self.errors += error
+        if len(self.latencies) < self.SAMPLES:
+            self.latencies.append(seconds)
+        else:
+            self.latencies[self._next] = seconds
+            self._next = (self._next + 1) % self.SAMPLES
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def report(self, sessions: int) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {"sessions": sessions, "commands": self.commands, "errors": self.errors, "evicted": self.evicted,
+                "commands_per_second": self.commands / elapsed if elapsed else 0.0,
+                "p50_us": self.percentile(0.50) * 1e6, "p99_us": self.percentile(0.99) * 1e6}
+
+
+class GameServer:
+
+    def __init__(self, *, idle_seconds: float = 300.0, max_sessions: int = 100_000, max_session_bytes: int = 4096,
+                 replay_log: ReplayLog | None = None):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.max_session_bytes = max_session_bytes
+        self.replay_log = replay_log
+        self.sessions: dict[str, Session] = {}  # by token
+        self.metrics = Metrics()
+        self._ids = itertools.count(replay_log.next_id if replay_log is not None else 1)
+        self.server: asyncio.Server | None = None
+        self._reaper: asyncio.Task | None = None
+
+    # ################################################################################################################
+    #  Sessions
+    # ################################################################################################################
+
+    def newSession(self, seed: int | None = None) -> Session:
+        if len(self.sessions) >= self.max_sessions:
+            self.evictIdle(time.monotonic(), force=True)
+        game = Game()
+        game.start(seed)
+        sid = self.replay_log.attach(game, seed) if self.replay_log is not None else next(self._ids)
+        session = Session(id=sid, token=secrets.token_hex(16), game=game, last_used=time.monotonic())
+        self.sessions[session.token] = session
+        return session
+
+    def evictIdle(self, now: float, force: bool = False) -> int:
+        """ drop the sessions idle for idle_seconds.  force also drops the least recently used one"""
+        stale = [s.token for s in self.sessions.values() if now - s.last_used > self.idle_seconds]
+        if force and not stale and self.sessions:
+            stale = [min(self.sessions.values(), key=lambda s: s.last_used).token]
+        for token in stale:
+            self.endSession(self.sessions[token])
+        self.metrics.evicted += len(stale)
+        return len(stale)
+
+    def endSession(self, session: Session) -> None:
+        """ drop session, and stop logging its game"""
+        self.sessions.pop(session.token, None)
+        if self.replay_log is not None:
+            self.replay_log.detach(session.game, session.id)
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.idle_seconds, 30.0) / 2)
+            self.evictIdle(time.monotonic())
+
+    # ################################################################################################################
+    #  Commands
+    # ################################################################################################################
+
+    def move(self, session: Session, command: str) -> str:
+        game = session.game
+        tokens = command.split('-')
+        src = tokens[0].upper() if tokens[0] in ("t", "T", "x", "X") else tokens[0].lower()
+        dest = tokens[1].lower() if len(tokens) > 1 else ""
+
+        if src == "X" and not dest:
+            if not game.canDeal():
+                return "error illegal move"
+            action = DEAL
+        else:
+            action = next((a for a in game.moves() if a.src.lower() == src.lower() and a.dest == dest), None)
+            if action is None:
+                return "error illegal move"
+
+        history = encodeActions([action])
+        if session.footprint() + len(history) > self.max_session_bytes:
+            self.endSession(session)
+            return "error session memory cap reached"
+        applyAction(game, action)
+        session.history += history
+
+        state = game.state()
+        foundation = sum(s.deck.size() for s in state.suitstacks.values())
+        return f"ok {foundation} won" if state.isWon() else f"ok {foundation}"
+
+    def execute(self, session: Session | None, line: str) -> tuple[Session | None, str]:
+        """ (the session of the connection after line, the answer)"""
+        words = line.split()
+        if not words:
+            return session, "error empty command"
+        command = words[0]
+
+        if command == "new":
+            seed = int(words[1]) if len(words) > 1 else None
+            session = self.newSession(seed)
+            return session, f"session {session.token}"
+        if command == "resume":
+            resumed = self.sessions.get(words[1]) if len(words) > 1 else None
+            if resumed is None:
+                return session, "error no such session"
+            return resumed, f"session {resumed.token}"
+        if command == "metrics":
+            return session, json.dumps(self.metrics.report(len(self.sessions)))
+
+        if session is None or session.token not in self.sessions:
+            return None, "error no session, send new"
+        session.last_used = time.monotonic()
+
+        if command == "moves":
+            game = session.game
+            moves = [a.display() for a in game.moves()]
+            if game.canDeal():
+                moves.append("X")
+            return session, " ".join(moves)
+        if command == "state":
+            return session, session.game.state().to_bytes().hex()
+        return session, self.move(session, command)
+
+    # ################################################################################################################
+    #  Network
+    # ################################################################################################################
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                text = line.decode(errors="replace").strip()
+                if text == "quit":
+                    break
+                started = time.perf_counter()
+                try:
+                    session, answer = self.execute(session, text)
+                except ValueError as e:
+                    answer = f"error {e}"
+                self.metrics.observe(time.perf_counter() - started, answer.startswith("error"))
+                writer.write(answer.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """ listen on host:port, port 0 picks a free one.  Returns the port"""
+        self.server = await asyncio.start_server(self.handle, host, port, limit=4096)
+        self._reaper = asyncio.create_task(self._reap())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.replay_log is not None:
+            self.replay_log.close()
+
+
+# ####################################################################################################################
+#  Load generator
+# ####################################################################################################################
+
+async def _client(host: str, port: int, seed: int, moves: int, latencies: list[float]) -> int:
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def ask(line: str) -> str:
+        started = time.perf_counter()
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        answer = (await reader.readline()).decode().strip()
+        latencies.append(time.perf_counter() - started)
+        return answer
+
+    sent = 1
+    await ask(f"new {seed}")
+    for _ in range(moves):
+        options = (await ask("moves")).split()
+        sent += 1
+        if not options:
+            break
+        answer = await ask(rng.choice(options).split(' ')[-1])
+        sent += 1
+        if answer.endswith("won") or answer.startswith("error session"):
+            break
+    writer.write(b"quit\n")
+    await writer.drain()
+    writer.close()
+    return sent
+
+
+async def loadTest(host: str, port: int, clients: int = 100, moves: int = 50) -> dict:
+    """ clients play random legal moves at the same time.  Latency is measured at the client"""
+    latencies: list[float] = []
+    started = time.perf_counter()
+    sent = await asyncio.gather(*[_client(host, port, seed, moves, latencies) for seed in range(clients)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {"clients": clients, "commands": sum(sent), "seconds": elapsed,
+            "commands_per_second": sum(sent) / elapsed,
+            "p50_us": latencies[len(latencies) // 2] * 1e6,
+            "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6}
+
+
+async def _serve(args) -> None:
+    server = GameServer(idle_seconds=args.idle, max_sessions=args.max_sessions, max_session_bytes=args.max_session_bytes,
+                        replay_log=ReplayLog(args.replay) if args.replay else None)
+    port = await server.start(args.host, args.port)
+    print(f"listening on {args.host}:{port}", file=sys.stderr)
+    if args.load:
+        print(json.dumps(await loadTest(args.host, port, args.load, args.moves)))
+        print(json.dumps(server.metrics.report(len(server.sessions))))
+        await server.close()
+        return
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="serve many games over TCP, one command per line")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle", type=float, default=300.0, help="seconds before an idle session is evicted")
+    parser.add_argument("--max-sessions", type=int, default=100_000)
+    parser.add_argument("--max-session-bytes", type=int, default=4096, help="bytes a session may hold, see Session.footprint")
+    parser.add_argument("--replay", default=None, help="log every game played to this replay log (see replay)")
+    parser.add_argument("--load", type=int, default=0, help="run this many load generator clients against the server and exit")
+    parser.add_argument("--moves", type=int, default=50, help="moves each load generator client plays")
+    asyncio.run(_serve(parser.parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
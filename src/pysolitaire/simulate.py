@@ -0,0 +1,254 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+import time
+
+from policy import BeamPolicy
+from rules import RuleSet
+from solitaire import Action, Game, applyAction, executeInput
+from solver import orderedActions
+from store import Store
+
+# Headless batch play: deal seeded games, play each one with a Policy and stream a GameRecord per game.
+# Games are spread over a process pool in chunks of seeds.
+
+
+class Policy:
+    """ picks the moves of one game.  A new Policy is made for every game"""
+
+    def __init__(self, seed: int = 0):
+        self.seen: set[int] = set()
+
+    def candidates(self, game: Game) -> list[Action]:
+        return orderedActions(game)
+
+    def choose(self, game: Game) -> Action | None:
+        """ the first candidate that leads to a position not seen before in this game. None to give up"""
+        state = game.state()
+        self.seen.add(state.zobrist())
+        journaling, probing = game.journal is not None, game.probing
+        game.probing = True
+
+        chosen = None
+        for action in self.candidates(game):
+            mark = game.mark()
+            executeInput(game, firstToken=action.src, secondToken=action.dest or None)
+            h = state.zobrist()
+            game.undo(mark)
+            if h not in self.seen:
+                chosen = action
+                break
+
+        game.probing = probing
+        if not journaling:
+            game.release()
+        return chosen
+
+
+class GreedyPolicy(Policy):
+    """ moves in the solver's move order"""
+
+
+class RandomPolicy(Policy):
+    """ moves in random order"""
+
+    def __init__(self, seed: int = 0):
+        super().__init__(seed)
+        self.rng = random.Random(seed)
+
+    def candidates(self, game: Game) -> list[Action]:
+        actions = orderedActions(game)
+        self.rng.shuffle(actions)
+        return actions
+
+
+POLICIES = {
+    "greedy": GreedyPolicy,
+    "random": RandomPolicy,
+    "beam": BeamPolicy,  # see policy
+}
+
+
+@dataclass
+class GameRecord:
+    seed: int
+    won: bool
+    moves: int
+    foundation: int  # cards on the SuitStacks at the end
+    elapsed: float
+    deal: int = 0  # Game.dealIndex()
+
+
+@dataclass
+class Summary:
+    games: int = 0
+    wins: int = 0
+    moves: int = 0
+    elapsed: float = 0.0  # wall clock
+
+    def add(self, record: GameRecord) -> None:
+        self.games += 1
+        self.wins += record.won
+        self.moves += record.moves
+
+    def winRate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def gamesPerSecond(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+
+def playGame(seed: int, policy: type[Policy] = GreedyPolicy, max_moves: int = 1000,
+             rules: RuleSet | None = None) -> GameRecord:
+    started = time.perf_counter()
+    game = Game(rules=rules)
+    game.start(seed)
+    player = policy(seed)
+
+    moves = 0
+    state = game.state()
+    while moves < max_moves and not state.isWon():
+        action = player.choose(game)
+        if action is None:
+            break
+        applyAction(game, action)
+        moves += 1
+
+    return GameRecord(seed=seed, won=state.isWon(), moves=moves,
+                      foundation=sum(s.deck.size() for s in state.suitstacks.values()),
+                      elapsed=time.perf_counter() - started, deal=game.dealIndex())
+
+
+def _playChunk(seeds: list[int], policy: type[Policy], max_moves: int, rules: RuleSet | None,
+               store: str | None = None) -> list[GameRecord]:
+    records = [playGame(seed, policy, max_moves, rules) for seed in seeds]
+    if store is not None:
+        # each worker appends its own chunk, see store.Store
+        with Store(store) as out:
+            out.append(records)
+    return records
+
+
+def _chunks(seeds: Iterable[int], chunk_size: int) -> Iterator[list[int]]:
+    chunk = []
+    for seed in seeds:
+        chunk.append(seed)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def simulate(seeds: Iterable[int], *, policy: type[Policy] = GreedyPolicy, workers: int | None = None,
+             chunk_size: int = 64, max_moves: int = 1000, rules: RuleSet | None = None,
+             store: str | None = None) -> Iterator[GameRecord]:
+    """ plays one game per seed and yields the records as chunks finish, so not in seed order when workers > 1.
+        workers None uses every core, workers 1 plays in this process.
+        With store (a store.Store path) the records are appended to it and seeds already in it are skipped"""
+    if store is not None:
+        with Store(store) as done:
+            seeds = list(done.missing(seeds))
+
+    if workers == 1:
+        if store is None:
+            for seed in seeds:
+                yield playGame(seed, policy, max_moves, rules)
+            return
+        for chunk in _chunks(seeds, chunk_size):
+            yield from _playChunk(chunk, policy, max_moves, rules, store)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_playChunk, chunk, policy, max_moves, rules, store)
+                   for chunk in _chunks(seeds, chunk_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def run(seeds: Iterable[int], **kwargs) -> tuple[list[GameRecord], Summary]:
+    summary = Summary()
+    started = time.perf_counter()
+    records = []
+    for record in simulate(seeds, **kwargs):
+        summary.add(record)
+        records.append(record)
+    summary.elapsed = time.perf_counter() - started
+    return records, summary
+
+
+def scalingReport(seeds: list[int], worker_counts: Iterable[int], **kwargs) -> list[tuple[int, float, float]]:
+    """ (workers, games/sec, speedup over the first worker count) for the same seeds"""
+    report = []
+    for workers in worker_counts:
+        records, summary = run(seeds, workers=workers, **kwargs)
+        rate = summary.gamesPerSecond()
+        report.append((workers, rate, rate / report[0][1] if report else 1.0))
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="play many seeded games headless")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="first seed, games use seed .. seed+games-1")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--width", type=int, default=BeamPolicy.width, help="lines the beam policy keeps at each level")
+    parser.add_argument("--depth", type=int, default=BeamPolicy.depth, help="moves the beam policy looks ahead")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=64)
+    parser.add_argument("--max-moves", type=int, default=1000)
+    parser.add_argument("--draw", type=int, default=3, help="cards turned over by a deal")
+    parser.add_argument("--passes", type=int, default=None, help="times through the deal deck, default unlimited")
+    parser.add_argument("--scaling", default=None, help="comma separated worker counts to compare, e.g. 1,2,4")
+    parser.add_argument("--out", default=None, help="write the JSON record of each game to this file instead of stdout")
+    parser.add_argument("--store", default=None, help="append the records to this result store and skip the seeds in it")
+    parser.add_argument("--profile", default=None,
+                        help="count the engine calls (see profiling) and write cProfile stats to this file. Plays in one process")
+    args = parser.parse_args(argv)
+    if args.profile:
+        import profiling  # only loaded when asked for, it pulls in cProfile
+
+    seeds = range(args.seed, args.seed + args.games)
+    policy = POLICIES[args.policy]
+    if policy is BeamPolicy:
+        policy = functools.partial(BeamPolicy, width=args.width, depth=args.depth)
+    options = dict(policy=policy, chunk_size=args.chunk, max_moves=args.max_moves,
+                   rules=RuleSet(draw=args.draw, passes=args.passes))
+
+    if args.scaling:
+        for workers, rate, speedup in scalingReport(list(seeds), [int(w) for w in args.scaling.split(',')], **options):
+            print(f"workers {workers:3d}: {rate:10.1f} games/sec  speedup {speedup:5.2f}")
+        return
+
+    if args.profile:
+        args.workers = 1  # the other processes would not be profiled
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    summary = Summary()
+    started = time.perf_counter()
+    try:
+        with profiling.profile(args.profile) if args.profile else nullcontext():
+            for record in simulate(seeds, workers=args.workers, store=args.store, **options):
+                summary.add(record)
+                out.write(json.dumps(asdict(record)) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    summary.elapsed = time.perf_counter() - started
+
+    if args.profile:
+        print(profiling.summary(), file=sys.stderr)
+    workers = args.workers or os.cpu_count()
+    print(f"{summary.games} games, {summary.wins} won ({summary.winRate():.1%}), "
+          f"{summary.gamesPerSecond():.1f} games/sec on {workers} workers", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,11 @@
-from card_model import Deck, Card, CardSuit, CardValue
-from dataclasses import dataclass
-from rich import print as rprint
-import copy
+from card_model import CARD_COUNT, CARD_RANK, CARD_RED, CARD_SUIT, CARDS, Deck, Card, CardSuit
+from card_model import permutationFromIndex, permutationIndex
+from rules import EMPTY, KING, MAX_COLUMNS, STACK_ON, RuleSet, canFound, canStack
+from talon import TalonIndex
+import zobrist
+from dataclasses import dataclass, field
+from typing import Iterator
+import random
 
 
 class BuildStack:
@@ -54,28 +58,18 @@ class BuildStack:
             return False
 
         # King can go on empty buildStack
-        if destination is None and source.value == CardValue.KING:
-            return True  # moving a king to an open pile
-
-        # if the destination is None then bail
         if destination is None:
-            return False
+            return canStack(source.code, EMPTY)
 
-        # check Suit Color
-        if source.isRed() and destination.isRed() or source.isBlack() and destination.isBlack():
-            return False
-
-        diff = destination.getIntValue() - source.getIntValue()
-        if diff == 1:
-            return True
-
-        return False
+        # opposite colour and one rank lower
+        return canStack(source.code, destination.code)
 
 
 class SuitStack:
     """cards are added to the end of the deck (pos=-1)"""
     def __init__(self, *, suit: CardSuit):
         self.suit = suit
+        self.suit_index = suit.value - 1
         self.deck = Deck()
 
     def peekLast(self):
@@ -85,18 +79,8 @@ class SuitStack:
     def validateAppend(self, card) -> bool:
         if card is None:
             return False
-        if card.suit != self.suit:
-            return False
-        if self.deck.size() == 0:
-            if card.value == CardValue.ACE:
-                return True
-            return False
-
-        lastCard = self.deck.peek(pos=-1)
-        diff = card.getIntValue() - lastCard.getIntValue()
-        if diff == 1:
-            return True
-        return False
+        # same suit and one rank above the last card (ACE on an empty stack)
+        return canFound(card.code, self.suit_index, len(self.deck.codes))
 
     def appendOne(self, card: Card) -> None:
         if self.validateAppend(card):
@@ -113,13 +97,103 @@ class GameState:
     buildstacks: list[BuildStack]
     talon: Deck
     deal_deck: Deck
+    rules: RuleSet = field(default_factory=RuleSet)
+    recycles: int = 0  # times the talon was turned over into the deal deck
+
+    def to_bytes(self) -> bytes:
+        """ about 60 bytes, see codec"""
+        import codec
+        return codec.encodeState(self)
+
+    @classmethod
+    def from_bytes(cls, data) -> 'GameState':
+        """ data is bytes or a memoryview of them, see codec"""
+        import codec
+        return codec.decodeState(data)
+
+    def __reduce__(self):
+        # pickled (to worker processes) as the compact encoding
+        return GameState.from_bytes, (self.to_bytes(),)
+
+    def decks(self) -> list[Deck]:
+        """ every Deck in the state in a fixed order: suitstacks, buildstacks (hidden, visible), talon, deal deck"""
+        result = [self.suitstacks[k].deck for k in sorted(self.suitstacks)]
+        for b in self.buildstacks:
+            result.append(b.hidden_deck)
+            result.append(b.visible_deck)
+        result.append(self.talon)
+        result.append(self.deal_deck)
+        return result
+
+    def zobrist(self) -> int:
+        """ 64 bit hash of the position.  Positions that only differ in the order of the BuildStacks hash the same.
+            The first call binds keys to every Deck, after that each Deck change keeps it current in O(1)"""
+        if self.talon.keys is None:
+            self._bindKeys()
+
+        h = self.talon.hash ^ self.deal_deck.hash
+        for s in self.suitstacks.values():
+            h ^= s.deck.hash
+        columns = 0
+        for b in self.buildstacks:
+            columns += zobrist.mix64(b.hidden_deck.hash ^ b.visible_deck.hash)
+        if self.rules.passes is not None:
+            # with limited passes the same cards with fewer passes left are another position
+            h ^= zobrist.mix64(zobrist.RECYCLES_KEY + self.recycles)
+        return (h ^ columns) & zobrist.MASK64
+
+    def _bindKeys(self) -> None:
+        for s in self.suitstacks.values():
+            zobrist.bindKeys(s.deck, zobrist.SUITSTACK_KEYS, tail_anchored=False)
+        for b in self.buildstacks:
+            zobrist.bindKeys(b.hidden_deck, zobrist.HIDDEN_KEYS, tail_anchored=True)
+            zobrist.bindKeys(b.visible_deck, zobrist.VISIBLE_KEYS, tail_anchored=False)
+        zobrist.bindKeys(self.talon, zobrist.TALON_KEYS, tail_anchored=True)
+        zobrist.bindKeys(self.deal_deck, zobrist.DEAL_KEYS, tail_anchored=True)
+
+    def isWon(self) -> bool:
+        return all(len(s.deck.codes) == 13 for s in self.suitstacks.values())
+
+    def clone(self) -> 'GameState':
+        """ independent copy that shares no Deck. Much cheaper than copy.deepcopy"""
+        state = GameState(
+            suitstacks={k: SuitStack(suit=v.suit) for k, v in self.suitstacks.items()},
+            buildstacks=[BuildStack() for b in self.buildstacks],
+            talon=Deck(),
+            deal_deck=Deck(),
+            rules=self.rules
+        )
+        state.restore(self.snapshot())
+        return state
+
+    def snapshot(self) -> 'GameSnapshot':
+        return GameSnapshot(decks=tuple(bytes(d.codes) for d in self.decks()), recycles=self.recycles)
+
+    def restore(self, snapshot: 'GameSnapshot') -> None:
+        """ put the state back to snapshot. This is not journaled"""
+        for deck, codes in zip(self.decks(), snapshot.decks):
+            deck.splice(0, deck.size(), codes)
+        self.recycles = snapshot.recycles
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """ immutable copy of the card codes of every deck in a GameState (see GameState.decks)"""
+    decks: tuple[bytes, ...]
+    recycles: int = 0
+
+
+TALON_INDEXES = 4096  # TalonIndex kept by Game.talonMoves()
+DEAL_STACKS = frozenset("TX")
+ALL_STACKS = frozenset("cdhsTX123456789")
 
 
 class Game:
 
-    def __init__(self, game_state: GameState = None):
+    def __init__(self, game_state: GameState = None, *, rules: RuleSet | None = None):
 
         if game_state is None:
+            rules = rules or RuleSet()
             game_state = GameState(
                 deal_deck=Deck.build_standard_52_deck(),
                 talon=Deck(),  # empty deck
@@ -129,10 +203,31 @@ class Game:
                     "h": SuitStack(suit=CardSuit.HEARTS),
                     "s": SuitStack(suit=CardSuit.SPADES)
                 },
-                buildstacks=[BuildStack() for i in range(7)]
+                buildstacks=[BuildStack() for i in range(rules.columns)],
+                rules=rules
             )
+        else:
+            rules = rules or game_state.rules
+            if rules.columns != len(game_state.buildstacks):
+                raise ValueError(f"the rules are for {rules.columns} BuildStacks, "
+                                 f"the position has {len(game_state.buildstacks)}")
+            game_state.rules = rules
+
+        # the variant is read once here so that deal and executeInput do not look at the RuleSet
+        rules = game_state.rules
+        self.draw = rules.draw
+        self.max_recycles = None if rules.passes is None else rules.passes - 1
+        self.buildstack_ids = [str(i + 1) for i in range(len(game_state.buildstacks))]
 
         self.game_state = game_state
+        self.journal: list | None = None
+        self.movegen: 'MoveGenerator | None' = None
+        self.talon_indexes: dict[tuple, TalonIndex] = {}  # by (talon, deal deck, recycles), see talonMoves()
+        self.hint_engine = None  # see hintEngine()
+        self.listeners: list = []  # see subscribe()
+        self.recorder = None  # recorder(game, src, dest) after each move played, see replay.ReplayLog.attach
+        self.probing = False  # moves are only being tried and will be taken back: they are not recorded
+        self.deal_codes: bytes = b''
 
     def getBuildStack(self, idx: int) -> BuildStack | None:
         try:
@@ -150,78 +245,226 @@ class Game:
     def getTalon(self):
         return self.game_state.talon
 
-    def start(self) -> None:
+    def start(self, seed: int | random.Random | None = None, *, deal: int | None = None) -> None:
+        """ shuffle and lay out the cards.  seed (or a random.Random) makes the shuffle repeatable,
+            deal is a deal index (see card_model.permutationIndex) to lay out instead of shuffling"""
 
-        self.game_state.deal_deck.shuffle()
+        if deal is not None:
+            self.game_state.deal_deck.splice(0, self.game_state.deal_deck.size(), permutationFromIndex(deal))
+        else:
+            self.game_state.deal_deck.shuffle(random.Random(seed) if isinstance(seed, int) else seed)
+
+        # the order the cards were dealt in, see dealIndex()
+        self.deal_codes = bytes(self.game_state.deal_deck.codes)
 
-        for s in range(7):
-            for i in range(s, 7):
+        columns = len(self.game_state.buildstacks)
+        for s in range(columns):
+            for i in range(s, columns):
                 # print(f"{s} -> {i}")
                 # get a card from the deal_deck deck TOP
                 # put a card on the TOP
                 self.game_state.buildstacks[i].hidden_deck.putOne(self.game_state.deal_deck.getOne())
 
-        for i in range(7):
+        for i in range(columns):
             self.game_state.buildstacks[i].visible_deck.putOne(self.game_state.buildstacks[i].hidden_deck.getOne())
 
         self.deal()
 
+    def canRecycle(self) -> bool:
+        """ may the talon still be turned over into the deal deck"""
+        return self.max_recycles is None or self.game_state.recycles < self.max_recycles
+
     def deal(self):
+        talon = self.game_state.talon
+        deal_deck = self.game_state.deal_deck
+        draw = self.draw
 
-        if self.game_state.deal_deck.size() > 2:
+        if deal_deck.size() >= draw:
+            # same as putting the top cards on the talon one at a time
+            talon.giveCodes(deal_deck.takeCodes(draw))
 
-            for i in range(3):
-                self.game_state.talon.putOne(self.game_state.deal_deck.getOne())
+        elif not self.canRecycle():
+            # last pass: deal what is left
+            talon.giveCodes(deal_deck.takeCodes(draw))
 
         else:
-            if self.game_state.talon.size() != 0:
+            if talon.size() != 0:
                 # Make sure the remain cards are added in the correct way so that
-                # we continue to cycle
-
-                # get the cards from the talon deck
-                cards = self.game_state.talon.cards
-                cards.reverse()  # reverse them
-                for i in range(self.game_state.deal_deck.size()):
-                    cards.insert(0, self.game_state.deal_deck.getOne())
+                # we continue to cycle: the talon turned over, with the remaining
+                # cards in reverse order on top of it
+                remaining = deal_deck.takeCodes(deal_deck.size())
+                deal_deck.giveCodes(talon.takeCodes(talon.size()) + remaining)
+
+                if self.max_recycles is not None:
+                    # only counted when it matters, so unlimited games keep recycles at 0
+                    if self.journal is not None:
+                        self.journal.append((self.game_state, self.game_state.recycles))
+                    self.game_state.recycles += 1
             else:
-                print("******   DEAL DECK has 2 or less cards and TALON has 0 cards ******")
+                print(f"******   DEAL DECK has less than {draw} cards and TALON has 0 cards ******")
 
-            self.game_state.deal_deck = Deck(cards)
-            self.game_state.talon = Deck()
-
-            if self.game_state.deal_deck.size() > 2:
-
-                for i in range(3):
-                    self.game_state.talon.putOne(self.game_state.deal_deck.getOne())
+            if deal_deck.size() >= draw:
+                talon.giveCodes(deal_deck.takeCodes(draw))
 
+        if self.listeners:
+            self.notify(DEAL_STACKS)
+        if self.recorder is not None and not self.probing:
+            self.recorder(self, "X", "")
 
     def state(self) -> GameState:
         # TODO make a copy
         return self.game_state
 
+    def dealIndex(self) -> int:
+        """ the deal index of this game. Game().start(deal=game.dealIndex()) plays the same cards"""
+        return permutationIndex(self.deal_codes)
+
+    def canDeal(self) -> bool:
+        """ False when deal() would not change anything"""
+        size = self.game_state.deal_deck.size()
+        if size >= self.draw:
+            return True
+        if self.canRecycle():
+            return self.game_state.talon.size() > 0
+        return size > 0
+
+    def score(self) -> int:
+        """ cards on the SuitStacks, or Vegas dollars (5 a card less the 52 paid) with RuleSet.vegas"""
+        cards = sum(s.deck.size() for s in self.game_state.suitstacks.values())
+        if self.game_state.rules.vegas:
+            return 5 * cards - 52
+        return cards
+
+    def moves(self, prune: bool = False, last: 'Action | None' = None) -> Iterator['Action']:
+        """ legal moves of the current position, generated lazily.  prune leaves out the moves search never
+            needs, last is the move that led here (see MoveGenerator.moves)"""
+        if self.movegen is None:
+            self.movegen = MoveGenerator(self.game_state)
+        return self.movegen.moves(prune, last)
+
+    def talonKey(self) -> tuple:
+        state = self.game_state
+        return bytes(state.talon.codes), bytes(state.deal_deck.codes), state.recycles
+
+    def talonIndex(self) -> TalonIndex:
+        """ the talon cards dealing can reach from the current position"""
+        # tableau moves leave the talon and deal deck alone, so search keeps coming back to the same few
+        key = self.talonKey()
+        index = self.talon_indexes.get(key)
+        if index is None:
+            index = self._keepTalonIndex(key, TalonIndex.fromGame(self))
+        return index
+
+    def _keepTalonIndex(self, key: tuple, index: TalonIndex) -> TalonIndex:
+        if len(self.talon_indexes) >= TALON_INDEXES:
+            self.talon_indexes.clear()
+        self.talon_indexes[key] = index
+        return index
+
+    def talonMoves(self) -> Iterator['Action']:
+        """ "deal until X, then play X" moves for the talon cards that need at least one deal (see talon.TalonIndex)"""
+        if self.movegen is None:
+            self.movegen = MoveGenerator(self.game_state)
+        return self.movegen.talonMoves(self.talonIndex())
+
+    def subscribe(self, listener) -> None:
+        """ listener(game, ids) is called after a change with the ids of the stacks it touched:
+            c d h s, 1 to 7, T the talon and X the deal deck.  ALL_STACKS when any may have changed"""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener) -> None:
+        self.listeners.remove(listener)
+
+    def notify(self, ids) -> None:
+        for listener in self.listeners:
+            listener(self, ids)
+
+    def hintEngine(self):
+        """ the hints.HintEngine of this game.  It keeps its move tree from one call to the next"""
+        if self.hint_engine is None:
+            from hints import HintEngine
+            self.hint_engine = HintEngine(self)
+        return self.hint_engine
+
+    def autoComplete(self) -> int:
+        """ when the game is won by force put every card left on its SuitStack.  Returns the cards moved
+            (see endgame.autoComplete)"""
+        from endgame import autoComplete
+        return autoComplete(self)
+
+    def mark(self) -> int:
+        """ start journaling every Deck change.  Returns a mark for undo().  Marks nest"""
+        if self.journal is None:
+            self.journal = []
+            for deck in self.game_state.decks():
+                deck.journal = self.journal
+        return len(self.journal)
+
+    def undo(self, mark: int = 0) -> None:
+        """ revert every Deck change since mark. Costs O(cards moved)"""
+        journal = self.journal
+        if journal is None:
+            return
+
+        changed = len(journal) > mark
+        while len(journal) > mark:
+            entry = journal.pop()
+            if len(entry) == 2:
+                # (GameState, recycles) see deal()
+                entry[0].recycles = entry[1]
+                continue
+            deck, pos, old, count = entry
+            deck.splice(pos, count, old)
+        if self.listeners and changed:
+            self.notify(ALL_STACKS)  # listeners see the position the game is back in
+
+    def release(self) -> None:
+        """ stop journaling. Changes made so far can no longer be undone"""
+        if self.journal is None:
+            return
+        for deck in self.game_state.decks():
+            deck.journal = None
+        self.journal = None
+
 # ####################################################################################################################
 #
 # ####################################################################################################################
 
 
+_CARD_MARKUP: dict[int, str] = {}  # render_card() by card code
+
+
 def render_card(c: Card) -> str:
     if c is None:
         return "none"
+    markup = _CARD_MARKUP.get(c.code)
+    if markup is not None:
+        return markup
+
     cardColor = "black"
     if c.isRed():
         cardColor = "red"
 
-    return f"[{cardColor} bold]{str(c)}[/{cardColor} bold]"
+    markup = _CARD_MARKUP[c.code] = f"[{cardColor} bold]{str(c)}[/{cardColor} bold]"
+    return markup
 
 
 def renderState(gs: GameState):
+    # rich is only loaded by the first call, so headless users of the engine never import it
+    from rich import print as rprint
     COMMA = ','
     suitstacks = gs.suitstacks
 
     rprint(F"[C]lub: {render_card(suitstacks['c'].peekLast())} [D]iamond: {render_card(suitstacks['d'].peekLast())} [S]pade: {render_card(suitstacks['s'].peekLast())} [H]eart: {render_card(suitstacks['h'].peekLast())}")
 
-    for i in range(7, 0, -1):  # 6 5 4 3 2 1 0
-        rprint(F"[{i}] BuildStack <{gs.buildstacks[i-1].hidden_size()}>: {COMMA.join([render_card(c) for c in gs.buildstacks[i-1].visible_deck.cards])}")
+    for i in range(len(gs.buildstacks), 0, -1):  # 6 5 4 3 2 1 0
+        b = gs.buildstacks[i-1]
+        if gs.rules.thoughtful:
+            # Thoughtful: the hidden cards are shown bottom first inside the < >
+            hidden = COMMA.join([render_card(c) for c in reversed(b.hidden_deck.cards)])
+        else:
+            hidden = b.hidden_size()
+        rprint(F"[{i}] BuildStack <{hidden}>: {COMMA.join([render_card(c) for c in b.visible_deck.cards])}")
 
     rprint(F"[T]alon: {COMMA.join([render_card(c) for c in gs.talon.cards])}")
 
@@ -232,109 +475,186 @@ class Action:
     dest: str
     src_cards: list[Card]
     dest_card: Card = None
+    deals: int = 0  # deal this many times first: "deal until the card is on the talon, then play it"
 
     def display(self):
+        if not self.dest:
+            return self.src
+        if self.deals:
+            return F"X{self.deals} {self.src}-{self.dest}"
         return F"{self.src}-{self.dest}"
 
 
 
-def computeOptions(state: GameState) -> list[Action]:
-
-    # #################################
-    # WITH BuildStack 1 through 7
-    # #################################
-
-    actions = []
-
-    for i in range(7):
-
-        source_buildstack = state.buildstacks[i]
+# ####################################################################################################################
+#  Move generation.  Cards are matched by key = rank * 2 + red
+# ####################################################################################################################
 
-        # if the pile is empty move on
-        if source_buildstack.visible_deck.size() == 0:
-            continue
+CARD_KEY = bytes(CARD_RANK[c] * 2 + CARD_RED[c] for c in range(CARD_COUNT))
+# the key of the card that can be put on top of each card
+ACCEPT_KEY = bytes((CARD_RANK[c] - 1) * 2 + 1 - CARD_RED[c] for c in range(CARD_COUNT))
+KING_KEYS = (13 * 2, 13 * 2 + 1)  # an empty BuildStack takes a King of either colour
 
+# bit mask of BuildStacks -> their indexes in ascending order
+MASK_COLUMNS = tuple(tuple(i for i in range(MAX_COLUMNS) if m & (1 << i)) for m in range(1 << MAX_COLUMNS))
 
-        ###########################################################
-        # BuildStack TO Suitstacks
-        ###########################################################
 
-        source_card = source_buildstack.visible_deck.peek(pos=-1)
+def spareColumns(empty: int) -> int:
+    """ the empty BuildStacks of the mask but the first.  A King goes to any of them the same way"""
+    return empty & (empty - 1)
 
-        for sp_id in ['c', 'd', 's', 'h']:
-            suitstack = state.suitstacks[sp_id]
-            if suitstack.validateAppend(source_card):
-                actions.append(Action(src=str(i+1), dest=sp_id,src_cards=[source_card]))
-                break
 
-        ###########################################################
-        # Build Stack to Build Stack
-        ###########################################################
+class MoveGenerator:
+    """ legal moves of a GameState.  Keeps for every card key the mask of BuildStacks whose top accepts it,
+        and only updates the BuildStacks whose top changed since the last call"""
 
-        # if the BuildStack is empty and the first card is a King then dont move to another BuildStack
-        if source_card.value == CardValue.KING and source_buildstack.hidden_deck.size() == 0:
-            continue
+    def __init__(self, state: GameState):
+        self.state = state
+        self.accepting = [0] * (14 * 2)
+        self.tops = [None] * len(state.buildstacks)
+        self.suitstack_ids = {s.suit_index: k for k, s in state.suitstacks.items()}
 
-        for j in range(7):
-            if i == j:
+    def sync(self) -> None:
+        accepting = self.accepting
+        tops = self.tops
+        for i, b in enumerate(self.state.buildstacks):
+            visible = b.visible_deck.codes
+            top = visible[-1] if visible else EMPTY
+            old = tops[i]
+            if top == old:
                 continue
 
-            destination_card = state.buildstacks[j].destination_buildstack.peek(pos=-1)
-
-            for idx in range(source_buildstack.getVisible().size()):
-                source_card = source_buildstack.peek(pos=idx)
-                # if source_card can be appended to destination card
-                canAppend = BuildStack.canAppendRedBlackRule(source=source_card, destination=destination_card)
-                if canAppend:
-                    actions.append(Action(src=str(i + 1), dest=str(j+1), src_cards=[source_card]))
-                    break
-
-    # ################################################################################################################
-    #  Talon to SuiteStack
-    # ################################################################################################################
-
-    source_card = state.talon.peek(pos=0)
-
-    for sp_id in ['c', 'd', 's', 'h']:
-        suitstack = state.suitstacks[sp_id]
-        if suitstack.validateAppend(source_card):
-            actions.append(Action(src="T", dest=sp_id, src_cards=[source_card]))
-            break
-
-    # ################################################################################################################
-    #  Talon to BuildStacks
-    # ################################################################################################################
+            bit = 1 << i
+            if old == EMPTY:
+                for key in KING_KEYS:
+                    accepting[key] &= ~bit
+            elif old is not None:
+                accepting[ACCEPT_KEY[old]] &= ~bit
 
-    for i in range(7):
-
-        destination_card = state.buildstacks[i].destination_buildstack.peek(pos=-1)
-
-        canAppend = BuildStack.canAppendRedBlackRule(source=source_card, destination=destination_card)
-        if canAppend:
-            actions.append(Action(src="T", dest=str(i+1), src_cards=[source_card], dest_card=destination_card))
+            if top == EMPTY:
+                for key in KING_KEYS:
+                    accepting[key] |= bit
+            else:
+                accepting[ACCEPT_KEY[top]] |= bit
+            tops[i] = top
+
+    def foundation(self, code: int) -> str | None:
+        """ id of the SuitStack code can be put on"""
+        sid = self.suitstack_ids[CARD_SUIT[code]]
+        if len(self.state.suitstacks[sid].deck.codes) + 1 == CARD_RANK[code]:
+            return sid
+        return None
+
+    def moves(self, prune: bool = False, last: Action | None = None) -> Iterator[Action]:
+        """ yields the legal moves one at a time: BuildStacks, then the talon, then the SuitStacks.
+            prune leaves out the moves a search never needs, each as good as a move it keeps:
+              - a King only goes to the first empty BuildStack
+              - part of a run only moves to another BuildStack when the card it uncovers goes to its SuitStack,
+                otherwise it only swaps between two cards of the same rank and colour
+              - the card last put somewhere does not move again: from where it came it could have gone there
+                directly, or back is the position before last"""
+        self.sync()
+        state = self.state
+        accepting = self.accepting
+        buildstacks = state.buildstacks
+        spare = spareColumns(accepting[KING_KEYS[0]]) if prune else 0
+        moved = last.src_cards[0].code if prune and last is not None and last.src_cards else EMPTY
+
+        for i, source_buildstack in enumerate(buildstacks):
+            visible = source_buildstack.visible_deck.codes
+            if not visible:
+                continue
 
-    # ################################################################################################################
-    #  SuiteStacks to BuildStacks
-    # ################################################################################################################
+            # BuildStack TO Suitstacks
+            top = visible[-1]
+            sid = self.foundation(top)
+            if sid is not None and top != moved:
+                yield Action(src=str(i + 1), dest=sid, src_cards=[CARDS[top]], dest_card=state.suitstacks[sid].peekLast())
+
+            # Build Stack to Build Stack.  executeInput moves from the first visible card that fits
+            done = 1 << i
+            for idx, code in enumerate(visible):
+                mask = accepting[CARD_KEY[code]] & ~done
+                if not mask:
+                    continue
+                done |= mask
+
+                # a King that is already at the bottom of its pile does not move to another empty pile
+                if idx == 0 and CARD_RANK[code] == KING and not source_buildstack.hidden_deck.codes:
+                    continue
+                if prune:
+                    if code == moved or (idx > 0 and self.foundation(visible[idx - 1]) is None):
+                        continue
+                    mask &= ~spare
+
+                src_cards = [CARDS[c] for c in visible[idx:]]
+                for j in MASK_COLUMNS[mask]:
+                    yield Action(src=str(i + 1), dest=str(j + 1), src_cards=src_cards, dest_card=buildstacks[j].peek(pos=-1))
+
+        # Talon to SuiteStack and BuildStacks
+        if state.talon.codes:
+            top = state.talon.codes[0]
+            sid = self.foundation(top)
+            if sid is not None:
+                yield Action(src="T", dest=sid, src_cards=[CARDS[top]], dest_card=state.suitstacks[sid].peekLast())
+            for j in MASK_COLUMNS[accepting[CARD_KEY[top]] & ~spare]:
+                yield Action(src="T", dest=str(j + 1), src_cards=[CARDS[top]], dest_card=buildstacks[j].peek(pos=-1))
+
+        # SuiteStacks to BuildStacks
+        for sp_id in ['c', 'd', 's', 'h']:
+            codes = state.suitstacks[sp_id].deck.codes
+            if not codes:
+                continue
+            top = codes[-1]
+            if top == moved:
+                continue
+            for j in MASK_COLUMNS[accepting[CARD_KEY[top]] & ~spare]:
+                yield Action(src=sp_id, dest=str(j + 1), src_cards=[CARDS[top]], dest_card=buildstacks[j].peek(pos=-1))
+
+
+    def talonMoves(self, index: TalonIndex) -> Iterator[Action]:
+        """ yields a move with deals for every talon top index reaches with one or more deals that can be played.
+            A card that comes up again on a later pass is a separate move, the deal deck is left in another order.
+            These are only searched, so a King only goes to the first empty BuildStack (see moves)"""
+        self.sync()
+        state = self.state
+        accepting = self.accepting
+        buildstacks = state.buildstacks
+        spare = spareColumns(accepting[KING_KEYS[0]])
+
+        for deals, top in enumerate(index.tops()):
+            if deals == 0 or top == EMPTY:
+                continue  # deals 0 is the talon now, moves() has it
+            sid = self.foundation(top)
+            if sid is not None:
+                yield Action(src="T", dest=sid, src_cards=[CARDS[top]], dest_card=state.suitstacks[sid].peekLast(),
+                             deals=deals)
+            for j in MASK_COLUMNS[accepting[CARD_KEY[top]] & ~spare]:
+                yield Action(src="T", dest=str(j + 1), src_cards=[CARDS[top]], dest_card=buildstacks[j].peek(pos=-1),
+                             deals=deals)
 
-    for sp_id in ['c', 'd', 's', 'h']:
-        source_card = state.suitstacks[sp_id].peekLast()
 
-        for i in range(7):
-            destination_buildstack = state.buildstacks[i]
-            destination_card = state.buildstacks[i].destination_buildstack.peek(pos=-1)
+def computeOptions(state: GameState) -> list[Action]:
+    return list(MoveGenerator(state).moves())
 
-            if BuildStack.canAppendRedBlackRule(source=source_card, destination=destination_card):
-                actions.append(Action(src=sp_id, dest=str(i + 1), src_cards=[source_card], dest_card=destination_card))
 
-    return actions
+def applyAction(game: Game, action: Action) -> bool:
+    """ executeInput for an Action, making its deals first.  A talon card played updates the TalonIndex kept for
+        the position it was played from (see TalonIndex.played) instead of leaving a new one to be built"""
+    index = game.talon_indexes.get(game.talonKey()) if action.src == "T" else None
+    for _ in range(action.deals):
+        game.deal()
+    talon = len(game.game_state.talon.codes)
+    done = executeInput(game, firstToken=action.src, secondToken=action.dest or None)
+    if index is not None and len(game.game_state.talon.codes) < talon:
+        key = game.talonKey()
+        if key not in game.talon_indexes:
+            game._keepTalonIndex(key, index.played(action.deals))
+    return done
 
 
 def executeInput(game: Game, firstToken: str, secondToken:str = None) -> bool:
-
-    suitStackDesignators = ['c', 'C', 'd', 'D', 'S', 's', 'h', 'H', ]
-    buildStackDesignators = ["1", "2", "3", "4", "5", "6", "7", ]
-
+    """ plays a command as typed in main().  True for the exit command"""
     if firstToken == 'E':  # Exit Command
         return True
 
@@ -342,6 +662,21 @@ def executeInput(game: Game, firstToken: str, secondToken:str = None) -> bool:
         game.deal()
         return False
 
+    # only a move that was made is shown and recorded: an illegal one leaves the game as it was
+    if moveCards(game, firstToken, secondToken):
+        if game.listeners:
+            # T, X and the SuitStack ids the way Game.subscribe names them
+            game.notify({t.upper() if t in ('t', 'x') else t.lower() for t in (firstToken, secondToken) if t})
+        if game.recorder is not None and not game.probing:
+            game.recorder(game, firstToken, secondToken)
+    return False
+
+
+def moveCards(game: Game, firstToken: str, secondToken: str | None) -> bool:
+    """ the card moves of executeInput.  True when cards were moved"""
+    suitStackDesignators = ['c', 'C', 'd', 'D', 'S', 's', 'h', 'H', ]
+    buildStackDesignators = game.buildstack_ids
+
     # ########################################################################################
     # from talon Deck -- Tallon
     # ########################################################################################
@@ -355,6 +690,7 @@ def executeInput(game: Game, firstToken: str, secondToken:str = None) -> bool:
 
             if destination.validateAppend(source.peek()):
                 destination.appendOne(source.getOne())
+                return True
 
         else:
             # to Piles 1 through 7
@@ -362,8 +698,8 @@ def executeInput(game: Game, firstToken: str, secondToken:str = None) -> bool:
 
             if BuildStack.canAppendRedBlackRule(source=source.peek(), destination=destination.peek(pos=-1)):
                 destination.appendOne(source.getOne())
-            else:
-                print("Illegal move")
+                return True
+            print("Illegal move")
 
     # ###############################################################################
     # moving from BuildStacks TO: .....
@@ -378,21 +714,20 @@ def executeInput(game: Game, firstToken: str, secondToken:str = None) -> bool:
 
             if destination.validateAppend(source.peek(pos=-1)):
                 destination.appendOne(source.getOne(pos=-1))
+                return True
 
         elif secondToken in buildStackDesignators:
             destination = game.getBuildStack(int(secondToken)-1)
-            destination_card = destination.peek(pos=-1)
+            destination_codes = destination.visible_deck.codes
+            destination_code = destination_codes[-1] if destination_codes else EMPTY
 
-            for idx in range(source.getVisible().size()):
-                source_card = source.peek(pos=idx)
-                # if source_card can be appended to destination card
-                canAppend = BuildStack.canAppendRedBlackRule(source=source_card, destination=destination_card)
-                if canAppend:
+            for idx, source_code in enumerate(source.visible_deck.codes):
+                # if source card can be appended to destination card
+                if STACK_ON[source_code][destination_code]:
                     # take all the rest of the visibile pile and append it to the destination card
                     cards = source.getMany(start=idx)  # take from index to the end
                     destination.appendMany(cards)
-
-                    break
+                    return True
 
                 # if not then look at the next position
 
@@ -408,7 +743,7 @@ def executeInput(game: Game, firstToken: str, secondToken:str = None) -> bool:
 
             if BuildStack.canAppendRedBlackRule(source=source.peekLast(), destination=destination.peek(-1)):
                 destination.appendOne(source.getOne())
-
+                return True
     return False
 
 # ####################################################################################################################
@@ -419,22 +754,18 @@ def main():
 
     game1 = Game()
     game1.start()
+    hints = game1.hintEngine()
 
     while True:
         state = game1.state()
         renderState(state)
-        options = computeOptions(state)
-        for o in options:
-
-            print(o.display())
-
-            # play this option
-            state_copy = copy.deepcopy(state)
-            new_game = Game(game_state=state_copy)
-            new_done = executeInput(new_game, firstToken=o.src, secondToken=o.dest)
-            next_options = computeOptions(new_game.state())
-            for oo in next_options:
-                print(f" +--- {oo.display()}")
+
+        # the options best first with their follow ups.  The tree is kept after the move is played
+        hints.deepen(0.2)
+        for o in hints.root.ranked():
+            print(f"{o.action.display()}  ({o.best:.0f})")
+            for oo in o.ranked():
+                print(f" +--- {oo.action.display()}")
 
         user_input = input(F"User input -- {state.deal_deck.size()+state.talon.size()} [E-xit, X deal]:")
 
@@ -0,0 +1,239 @@
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Iterable
+import argparse
+import sys
+import time
+
+from card_model import CARD_RANK
+from endgame import forcedWin, heights, isSafeFoundation, isWonByForce, playSafe
+from solitaire import Action, Game, GameState, applyAction
+
+# Depth first search over the legal moves + deal.  The Zobrist hash of every position already searched
+# is kept in a transposition table so every position is expanded at most once.
+# With macros the deal is replaced by "deal until X, then play X" moves for the talon cards X dealing can reach.
+# A safe move to a SuitStack (see endgame) is the only move searched from its position, and a position won by
+# force ends the search: its remaining moves are played out without searching.
+# With prune the moves a search never needs are left out (see MoveGenerator.moves) and the safe moves from the
+# BuildStacks after a move are played with it as one step, so search only branches where there is a choice.
+
+DEAL = Action(src="X", dest="", src_cards=[])
+SUITSTACK_IDS = "cdhs"
+
+
+@dataclass
+class SolveResult:
+    winnable: bool | None  # None when a budget ran out before the search finished
+    actions: list[Action] = field(default_factory=list)
+    nodes: int = 0
+    elapsed: float = 0.0
+    expanded: int = 0  # positions whose moves were generated
+    branches: int = 0  # the moves searched from them
+    legal: int = 0     # the moves they had without pruning, counted with solve(measure=True)
+
+    def branching(self) -> float:
+        """ the mean number of moves searched from a position"""
+        return self.branches / self.expanded if self.expanded else 0.0
+
+
+def actionPriority(state: GameState, action: Action) -> int:
+    """ lower is tried first"""
+    if action is DEAL:
+        return 5
+    if action.deals:
+        # after the moves that need no deal, like a plain deal would be
+        return 5
+    if action.dest in SUITSTACK_IDS:
+        if CARD_RANK[action.src_cards[0].code] <= 2:
+            return 0   # A and 2 always go to the SuitStack (see endgame.isSafeFoundation)
+        return 2
+    if action.src in SUITSTACK_IDS:
+        return 6
+    if action.src == "T":
+        return 3
+
+    # BuildStack to BuildStack: prefer moves that turn over a hidden card
+    source = state.buildstacks[int(action.src) - 1]
+    if source.hidden_size() > 0 and len(action.src_cards) == source.visible_deck.size():
+        return 1
+    return 4
+
+
+def orderedActions(game: Game, macros: bool = False, prune: bool = False, last: Action | None = None) -> list[Action]:
+    """ the moves of game, best first.  With macros talon cards still to be dealt to are moves of their own
+        and there is no plain deal.  prune and last are passed to Game.moves"""
+    state = game.state()
+    height = heights(state)
+    actions = []
+    for action in game.moves(prune, last):
+        # a safe move to a SuitStack can never hurt so there is nothing to branch on.  Not from the talon, even
+        # an A or 2: its cards also keep the deal going (Game.deal needs draw cards to turn over)
+        if action.dest in SUITSTACK_IDS and action.src != "T" and isSafeFoundation(action.src_cards[0].code, height):
+            return [action]
+        actions.append(action)
+
+    if macros:
+        actions.extend(game.talonMoves())
+    elif game.canDeal():
+        actions.append(DEAL)
+    actions.sort(key=lambda a: actionPriority(state, a))
+    return actions
+
+
+def expandActions(actions: list[Action]) -> list[Action]:
+    """ the actions with the deals of the macro moves as DEAL actions of their own, for executeInput"""
+    expanded = []
+    for action in actions:
+        if action.deals:
+            expanded.extend([DEAL] * action.deals)
+            action = Action(src=action.src, dest=action.dest, src_cards=action.src_cards, dest_card=action.dest_card)
+        expanded.append(action)
+    return expanded
+
+
+def solve(state: GameState, *, max_nodes: int = 1_000_000, max_seconds: float | None = None,
+          macros: bool = False, prune: bool = True, measure: bool = False) -> SolveResult:
+    """ decide if state can be won.  state is not changed.  The search stops with winnable None
+        once max_nodes positions were visited or max_seconds passed.
+        macros searches talon moves as "deal until X, then play X" (see orderedActions).  Deals only matter
+        for the talon card they bring up, so this skips the positions in between without losing a win.
+        prune leaves out dominated moves and plays forced ones without branching.  measure also counts the moves
+        of every position expanded before pruning, which costs a second move generation"""
+    started = time.perf_counter()
+    deadline = None if max_seconds is None else started + max_seconds
+
+    game = Game(game_state=state.clone())
+    root = playSafe(game) if prune else []
+    if isWonByForce(game.state()):
+        return SolveResult(winnable=True, actions=root + forcedWin(game.state()), elapsed=time.perf_counter() - started)
+
+    def expand(last: Action | None) -> list[Action]:
+        actions = orderedActions(game, macros, prune, last)
+        result.expanded += 1
+        result.branches += len(actions)
+        if measure:
+            result.legal += len(orderedActions(game, macros))
+        return actions
+
+    result = SolveResult(winnable=None)
+    seen = {game.state().zobrist()}
+    path: list[list[Action]] = [root]  # the steps to the position of each frame: a move and the safe moves after it
+    frames = [(game.mark(), iter(expand(root[-1] if root else None)))]
+    nodes = 0
+
+    while frames:
+        mark, actions = frames[-1]
+        action = next(actions, None)
+
+        if action is None:
+            # every move from here was searched
+            frames.pop()
+            path.pop()
+            continue
+
+        if nodes >= max_nodes or (deadline is not None and (nodes & 1023) == 0 and time.perf_counter() > deadline):
+            result.nodes, result.elapsed = nodes, time.perf_counter() - started
+            return result
+
+        game.undo(mark)  # take back the previous sibling
+        applyAction(game, action)
+        nodes += 1
+
+        current = game.state()
+        key = current.zobrist()
+        if key in seen:
+            continue
+        seen.add(key)
+
+        step = [action]
+        if prune:
+            # the safe moves lead to the same place from every path here, so they are only played once
+            step += playSafe(game)
+            if len(step) > 1:
+                key = current.zobrist()
+                if key in seen:
+                    continue
+                seen.add(key)
+
+        if isWonByForce(current):
+            result.winnable = True
+            result.actions = expandActions([a for s in path for a in s] + step) + forcedWin(current)
+            result.nodes, result.elapsed = nodes, time.perf_counter() - started
+            return result
+
+        path.append(step)
+        frames.append((game.mark(), iter(expand(step[-1]))))
+
+    result.winnable = False
+    result.nodes, result.elapsed = nodes, time.perf_counter() - started
+    return result
+
+
+def branchingReport(seeds: Iterable[int], **options) -> list[tuple[str, int, int, float, float]]:
+    """ (search, wins, nodes, moves searched per position, moves per position before pruning) over the deals
+        of seeds, solved without and with prune.  options go to solve()"""
+    report = []
+    for prune in (False, True):
+        wins = nodes = expanded = branches = legal = 0
+        for seed in seeds:
+            game = Game()
+            game.start(seed)
+            result = solve(game.state(), prune=prune, measure=True, **options)
+            wins += result.winnable is True
+            nodes += result.nodes
+            expanded += result.expanded
+            branches += result.branches
+            legal += result.legal
+        report.append(("pruned" if prune else "unpruned", wins, nodes, branches / expanded, legal / expanded))
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="solve seeded deals")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0, help="first seed, games use seed .. seed+games-1")
+    parser.add_argument("--max-nodes", type=int, default=1_000_000)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--macros", action="store_true", help="search deal-then-play talon moves")
+    parser.add_argument("--workers", type=int, default=1, help="solve each deal over this many processes (see parallel)")
+    parser.add_argument("--speedup", default=None, help="comma separated worker counts to compare on each deal, e.g. 1,2,4")
+    parser.add_argument("--no-prune", action="store_true", help="search every legal move (see MoveGenerator.moves)")
+    parser.add_argument("--branching", action="store_true", help="compare the branching factor without and with pruning on the deals")
+    parser.add_argument("--profile", default=None, help="count the engine calls (see profiling) and write cProfile stats to this file")
+    args = parser.parse_args(argv)
+    if args.profile:
+        import profiling  # only loaded when asked for, it pulls in cProfile
+
+    options = dict(max_nodes=args.max_nodes, max_seconds=args.max_seconds, macros=args.macros)
+    if args.branching:
+        for name, wins, nodes, searched, legal in branchingReport(range(args.seed, args.seed + args.games), **options):
+            print(f"{name:<9} {wins} won  {nodes} nodes  {searched:.2f} moves searched of {legal:.2f} per position")
+        return
+    if args.speedup:
+        import parallel
+        for seed in range(args.seed, args.seed + args.games):
+            game = Game()
+            game.start(seed)
+            for workers, seconds, speedup, nodes in parallel.speedupReport(
+                    game.state(), [int(w) for w in args.speedup.split(',')], **options):
+                print(f"seed {seed} workers {workers:3d}: {seconds:8.2f}s  speedup {speedup:5.2f}  {nodes} nodes")
+        return
+
+    with profiling.profile(args.profile) if args.profile else nullcontext():
+        for seed in range(args.seed, args.seed + args.games):
+            game = Game()
+            game.start(seed)
+            if args.workers > 1:
+                import parallel
+                result = parallel.solveParallel(game.state(), workers=args.workers, **options)
+            else:
+                result = solve(game.state(), prune=not args.no_prune, **options)
+            print(f"seed {seed}: winnable {result.winnable}  {result.nodes} nodes  {result.elapsed:.2f}s  "
+                  f"{len(result.actions)} moves")
+
+    if args.profile:
+        print(profiling.summary(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+import fcntl
+import mmap
+import os
+import struct
+
+from card_model import DEAL_BYTES
+
+# Campaign results on disk: a 16 byte header then fixed width records, one per game, in the order they were
+# appended.  Records are only ever appended, with O_APPEND and a whole number of records per write under an
+# exclusive flock, so several processes can append to the same file.  Reads map the file, so nothing is loaded
+# into memory up front.
+#
+# A record is 64 bytes, little endian:
+#   seed      u8  (uint64)
+#   elapsed   f8  seconds to play or solve the game
+#   moves     u2
+#   won       u1  0 lost, 1 won, 2 unknown (a solver budget ran out)
+#   foundation u1 cards on the SuitStacks at the end
+#   deal      29 bytes, the deal index (card_model.permutationIndex) big endian
+#   15 bytes padding
+
+MAGIC = b"PYSOLREC"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, record size
+RECORD = struct.Struct(f"<QdHBB{DEAL_BYTES}s15x")
+
+UNKNOWN = 2
+
+# the same layout for numpy.memmap, see Store.array()
+DTYPE = [("seed", "<u8"), ("elapsed", "<f8"), ("moves", "<u2"), ("won", "u1"), ("foundation", "u1"),
+         ("deal", f"S{DEAL_BYTES}"), ("pad", "V15")]
+
+
+@dataclass
+class StoreRecord:
+    seed: int
+    won: bool | None
+    moves: int
+    foundation: int
+    elapsed: float
+    deal: int = 0
+
+    def pack(self) -> bytes:
+        won = UNKNOWN if self.won is None else int(self.won)
+        return RECORD.pack(self.seed, self.elapsed, self.moves, won, self.foundation,
+                           self.deal.to_bytes(DEAL_BYTES, "big"))
+
+    @classmethod
+    def unpack(cls, data) -> 'StoreRecord':
+        seed, elapsed, moves, won, foundation, deal = RECORD.unpack(data)
+        return cls(seed=seed, won=None if won == UNKNOWN else bool(won), moves=moves, foundation=foundation,
+                   elapsed=elapsed, deal=int.from_bytes(deal, "big"))
+
+
+def writeAll(fd: int, data: bytes) -> None:
+    """ os.write until all of data is written, os.write may write less"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class Store:
+    """ an append only file of StoreRecords.  Open one per process"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        # under the lock, so of two processes opening a new file only the first writes the header
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size == 0:
+                writeAll(self.fd, HEADER.pack(MAGIC, VERSION, RECORD.size))
+            else:
+                magic, version, size = HEADER.unpack(os.pread(self.fd, HEADER.size, 0))
+                if magic != MAGIC or version != VERSION or size != RECORD.size:
+                    self.close()
+                    raise ValueError(f"{path} is not a version {VERSION} result store")
+        finally:
+            if self.fd >= 0:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self) -> 'Store':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, records: Iterable) -> int:
+        """ append records (StoreRecord, or anything with the same fields like simulate.GameRecord) in one write.
+            Returns how many were written"""
+        data = b''.join(r.pack() if isinstance(r, StoreRecord) else
+                        StoreRecord(seed=r.seed, won=r.won, moves=r.moves, foundation=r.foundation,
+                                    elapsed=r.elapsed, deal=getattr(r, "deal", 0)).pack() for r in records)
+        if data:
+            # records of other processes cannot interleave, even when the write takes more than one call
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                writeAll(self.fd, data)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        return len(data) // RECORD.size
+
+    def __len__(self) -> int:
+        # a record still being written by another process is not counted
+        return (os.fstat(self.fd).st_size - HEADER.size) // RECORD.size
+
+    def _view(self) -> memoryview | None:
+        count = len(self)
+        if count == 0:
+            return None
+        mapped = mmap.mmap(self.fd, HEADER.size + count * RECORD.size, access=mmap.ACCESS_READ)
+        return memoryview(mapped)[HEADER.size:]
+
+    def __iter__(self) -> Iterator[StoreRecord]:
+        view = self._view()
+        if view is None:
+            return
+        try:
+            for offset in range(0, len(view), RECORD.size):
+                yield StoreRecord.unpack(view[offset:offset + RECORD.size])
+        finally:
+            view.release()
+
+    def seeds(self) -> set[int]:
+        """ the seeds already in the store"""
+        view = self._view()
+        if view is None:
+            return set()
+        try:
+            return {seed for seed, *_ in RECORD.iter_unpack(view)}
+        finally:
+            view.release()
+
+    def missing(self, seeds: Iterable[int]) -> Iterator[int]:
+        """ the seeds that are not in the store yet, to resume a campaign"""
+        done = self.seeds()
+        return (seed for seed in seeds if seed not in done)
+
+    def array(self):
+        """ every record as a read only numpy record array (fields of DTYPE) over the mapped file.  Needs numpy"""
+        import numpy as np
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.dtype(DTYPE))
+        return np.memmap(self.path, dtype=np.dtype(DTYPE), mode="r", offset=HEADER.size, shape=(len(self),))
@@ -0,0 +1,121 @@
+from rules import EMPTY
+
+# Which talon cards can be reached by dealing, and after how many deals, worked out on plain byte strings
+# instead of moving cards between Decks.  Search uses it to play "deal until card X, then play X" as one move,
+# and TalonIndex.played() gives the index after such a move from the one before.
+# Codes are top first, like Deck.codes.
+
+
+def dealCodes(talon: bytes, deal_deck: bytes, draw: int, can_recycle: bool) -> tuple[bytes, bytes, bool]:
+    """ (talon, deal_deck, recycled) after one deal.  Same steps as Game.deal"""
+    if len(deal_deck) >= draw or not can_recycle:
+        return bytes(reversed(deal_deck[:draw])) + talon, deal_deck[draw:], False
+    if not talon:
+        return talon, deal_deck, False
+
+    # the talon turned over with the remaining cards in reverse order on top, see Game.deal
+    deal_deck = bytes(reversed(talon + deal_deck))
+    if len(deal_deck) < draw:
+        return b'', deal_deck, True
+    return bytes(reversed(deal_deck[:draw])), deal_deck[draw:], True
+
+
+class TalonIndex:
+    """ the talon top after 0, 1, 2 ... deals from a position, until the deal deck and talon repeat
+        (or limit deals).  reach[code] is the fewest deals that bring code to the top of the talon"""
+
+    def __init__(self, talon: bytes, deal_deck: bytes, *, draw: int = 3, recycles: int = 0,
+                 max_recycles: int | None = None, limit: int | None = None):
+        self.draw = draw
+        self.max_recycles = max_recycles
+        self.limit = limit
+        self._build(bytes(talon), bytes(deal_deck), recycles)
+
+    @classmethod
+    def fromGame(cls, game, limit: int | None = None) -> 'TalonIndex':
+        state = game.state()
+        return cls(state.talon.codes, state.deal_deck.codes, draw=game.draw, recycles=state.recycles,
+                   max_recycles=game.max_recycles, limit=limit)
+
+    def _build(self, talon: bytes, deal_deck: bytes, recycles: int) -> None:
+        self._extend([(talon, deal_deck, recycles)], [0])
+
+    def _extend(self, positions: list[tuple[bytes, bytes, int]], turns: list[int]) -> None:
+        # positions[d] = (talon, deal_deck, recycles) after d deals, turns[d] the times the talon was turned over
+        # on the way.  Dealing goes on from the last of positions
+        if self.limit is not None:
+            del positions[self.limit + 1:], turns[self.limit + 1:]
+        self.positions = positions
+        self.turns = turns
+        self.reach: dict[int, int] = {}
+        self.loop = None  # first deal count of the repeating part, None when dealing stops or limit was hit
+        seen = {}
+        for deals, position in enumerate(positions):
+            seen[position] = deals
+            if position[0]:
+                self.reach.setdefault(position[0][0], deals)
+        talon, deal_deck, recycles = positions[-1]
+
+        while True:
+            deals = len(positions) - 1
+            if self.limit is not None and deals >= self.limit:
+                return
+
+            position, recycled = self._deal(talon, deal_deck, recycles)
+            if position == positions[-1]:
+                return  # nothing left to deal
+            if position in seen:
+                self.loop = seen[position]
+                return
+            talon, deal_deck, recycles = position
+            seen[position] = len(positions)
+            positions.append(position)
+            turns.append(turns[-1] + recycled)
+            if talon:
+                self.reach.setdefault(talon[0], len(positions) - 1)
+
+    def played(self, deals: int) -> 'TalonIndex':
+        """ the index after deals deals and the talon top played.  Until the talon is next turned over the
+            positions are the ones of this index with that card taken out, only the ones after are dealt again"""
+        if deals < len(self.positions):
+            start = deals
+        elif self.loop is not None:
+            start = self.loop + (deals - self.loop) % (len(self.positions) - self.loop)
+        else:
+            start = None  # past the limit
+
+        index = object.__new__(TalonIndex)
+        index.draw, index.max_recycles, index.limit = self.draw, self.max_recycles, self.limit
+        if start is None:
+            talon, deal_deck, recycles = self.positions[-1]
+            for _ in range(deals - len(self.positions) + 1):
+                (talon, deal_deck, recycles), _ = self._deal(talon, deal_deck, recycles)
+            index._build(talon[1:], deal_deck, recycles)
+            return index
+
+        talon, deal_deck, recycles = self.positions[start]
+        under = len(talon)
+        positions = [(talon[1:], deal_deck, recycles)]
+        end = start + 1
+        while end < len(self.positions) and self.turns[end] == self.turns[start]:
+            # the cards dealt since lie on top of the talon the card was played from
+            dealt, deal_deck, recycles = self.positions[end]
+            positions.append((dealt[:len(dealt) - under] + talon[1:], deal_deck, recycles))
+            end += 1
+        index._extend(positions, [0] * len(positions))
+        return index
+
+    def tops(self) -> list[int]:
+        """ the talon top after 0, 1, 2 ... deals, EMPTY for an empty talon"""
+        return [talon[0] if talon else EMPTY for talon, _, _ in self.positions]
+
+    def reachable(self, deals: int | None = None) -> set[int]:
+        """ the codes that can be brought to the top of the talon within deals deals"""
+        return {code for code, d in self.reach.items() if deals is None or d <= deals}
+
+    def _deal(self, talon: bytes, deal_deck: bytes, recycles: int) -> tuple[tuple[bytes, bytes, int], bool]:
+        """ (the position after one deal, whether the talon was turned over)"""
+        can_recycle = self.max_recycles is None or recycles < self.max_recycles
+        talon, deal_deck, recycled = dealCodes(talon, deal_deck, self.draw, can_recycle)
+        # like GameState.recycles, only counted when passes are limited
+        return (talon, deal_deck, recycles + (recycled and self.max_recycles is not None)), recycled
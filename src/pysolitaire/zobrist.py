@@ -0,0 +1,38 @@
+import random
+
+from card_model import CARD_COUNT, Deck
+
+# 64 bit Zobrist keys.  A card's key depends on the kind of deck it is in and its depth in that deck
+# (see Deck.keys).  The seven BuildStacks share their tables so that the position does not depend on
+# which column holds which pile; GameState.zobrist() combines the columns with a symmetric sum.
+
+MASK64 = (1 << 64) - 1
+
+_rng = random.Random(0x5017a12e)
+
+
+def _table() -> list[int]:
+    """ keys indexed by depth * CARD_COUNT + code"""
+    return [_rng.getrandbits(64) for i in range(CARD_COUNT * CARD_COUNT)]
+
+
+HIDDEN_KEYS = _table()
+VISIBLE_KEYS = _table()
+SUITSTACK_KEYS = _table()
+TALON_KEYS = _table()
+DEAL_KEYS = _table()
+RECYCLES_KEY = _rng.getrandbits(64)
+
+
+def bindKeys(deck: Deck, keys: list[int], tail_anchored: bool) -> None:
+    """ start maintaining deck.hash.  Decks that change at their head (talon, deal deck, hidden) are tail anchored"""
+    deck.keys = keys
+    deck.tail_anchored = tail_anchored
+    deck.rehash()
+
+
+def mix64(x: int) -> int:
+    """ splitmix64 finaliser. Makes the per column hashes safe to add together"""
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & MASK64
+    return x ^ (x >> 31)
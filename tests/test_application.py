@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("textual")
+
+from application import SolitaireApp  # noqa: E402
+from solitaire import Game, executeInput, render_card  # noqa: E402
+
+
+def test_only_touched_stacks_repaint():
+    game = Game()
+    game.start(8)
+    move = next(a for a in game.moves() if a.src.isdigit() and a.dest.isdigit())
+
+    async def run():
+        app = SolitaireApp(game)
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            before = {sid: w.paints for sid, w in app.stacks.items()}
+            assert app.play(move.src, move.dest) == ""
+            await pilot.pause()
+            after = {sid: w.paints for sid, w in app.stacks.items()}
+            assert app.play("9", "c").startswith("illegal")
+        return before, after
+
+    before, after = asyncio.run(run())
+    repainted = {sid for sid in before if after[sid] != before[sid]}
+    assert repainted == {move.src, move.dest}
+
+
+def test_listeners_and_card_cache():
+    game = Game()
+    game.start(8)
+    seen = []
+    game.subscribe(lambda g, ids: seen.append(set(ids)))
+    executeInput(game, firstToken='X')
+    mark = game.mark()
+    executeInput(game, firstToken='X')
+    game.undo(mark)
+    assert seen[0] == {"T", "X"} and "1" in seen[-1]
+
+    card = game.state().talon.peek()
+    assert render_card(card) is render_card(card)
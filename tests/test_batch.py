@@ -0,0 +1,53 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch import DEAL, BatchGames, moveTokens
+from solitaire import Game, executeInput
+
+
+def scalarMoves(game: Game) -> set[tuple]:
+    moves = {(a.src, a.dest) for a in game.moves()}
+    if game.canDeal():
+        moves.add(('X', None))
+    return moves
+
+
+def test_batch_matches_scalar_engine():
+    seeds = list(range(24))
+    games = []
+    for seed in seeds:
+        game = Game()
+        game.start(seed)
+        games.append(game)
+    batch = BatchGames.fromSeeds(seeds)
+    rng = np.random.default_rng(1)
+
+    for step in range(200):
+        mask = batch.legalMask()
+        moves = np.full(len(seeds), -1)
+        for k, game in enumerate(games):
+            assert batch.toState(k).snapshot() == game.state().snapshot()
+            legal = np.nonzero(mask[k])[0]
+            assert {moveTokens(m) for m in legal} == scalarMoves(game)
+
+            # deal less often than other moves so the piles grow
+            if len(legal) and (rng.random() < 0.3 or len(legal) == 1 or step % 7 == 0):
+                moves[k] = rng.choice(legal)
+            elif len(legal):
+                moves[k] = rng.choice([m for m in legal if m != DEAL])
+
+        batch.apply(moves)
+        for k, game in enumerate(games):
+            if moves[k] >= 0:
+                executeInput(game, *moveTokens(moves[k]))
+
+
+def test_from_states_round_trip():
+    game = Game()
+    game.start(3)
+    for _ in range(5):
+        executeInput(game, 'X')
+    batch = BatchGames.fromStates([game.state()])
+    assert batch.toState(0).snapshot() == game.state().snapshot()
+    assert not batch.won()[0]
@@ -0,0 +1,87 @@
+import math
+import random
+
+from card_model import CARDS, DEAL_BITS, Card, CardSuit, CardValue, Deck, cardFromCode
+from card_model import permutationFromIndex, permutationIndex
+from rules import EMPTY, canFound, canStack
+from solitaire import Game
+
+
+def test_card_codes():
+    deck = Deck.build_standard_52_deck()
+    assert sorted(deck.codes) == list(range(52))
+    for c in deck.cards:
+        assert cardFromCode(c.code) == c
+        assert c.isRed() == c.suit.isRed()
+        assert c.getIntValue() == c.value.value
+
+
+def test_deck_view():
+    deck = Deck(cards=[CARDS[0], CARDS[1], CARDS[2]])
+    deck.putOne(CARDS[3], pos=0)
+    assert deck.peek() == CARDS[3]
+    assert deck.peek(pos=-1) == CARDS[2]
+    assert deck.getOne(pos=-1) == CARDS[2]
+    assert deck.getManySlice(start=1, end=-1) == [CARDS[0], CARDS[1]]
+    assert deck.cards == [CARDS[3]]
+    assert deck.getOne() == CARDS[3]
+    assert deck.getOne() is None
+    assert deck == Deck()
+
+
+def test_rules_match_card_rules():
+    for s in CARDS:
+        assert canStack(s.code, EMPTY) == (s.value == CardValue.KING)
+        for d in CARDS:
+            expected = s.isRed() != d.isRed() and d.getIntValue() - s.getIntValue() == 1
+            assert canStack(s.code, d.code) == expected
+        for suit in CardSuit:
+            for height in range(13):
+                expected = s.suit == suit and s.getIntValue() == height + 1
+                assert canFound(s.code, suit.value - 1, height) == expected
+
+
+def test_card_equality_ignores_code_field():
+    assert Card(value=CardValue.ACE, suit=CardSuit.SPADES) == CARDS[0]
+
+
+def test_permutation_index_round_trip():
+    rng = random.Random(9)
+    deck = Deck.build_standard_52_deck()
+    for _ in range(50):
+        deck.shuffle(rng)
+        index = deck.permutationIndex()
+        assert 0 <= index < math.factorial(52)
+        assert index.bit_length() <= DEAL_BITS
+        assert Deck.fromPermutationIndex(index) == deck
+
+    assert permutationIndex(range(52)) == 0
+    assert permutationFromIndex(math.factorial(52) - 1) == bytearray(reversed(range(52)))
+
+
+def test_seeded_start_is_repeatable():
+    first = Game()
+    first.start(seed=42)
+    second = Game()
+    second.start(random.Random(42))
+    assert first.state().snapshot() == second.state().snapshot()
+
+    replay = Game()
+    replay.start(deal=first.dealIndex())
+    assert replay.state().snapshot() == first.state().snapshot()
+
+
+def test_take_and_give_match_single_card_moves():
+    one = Deck(cards=list(CARDS[:10]))
+    bulk = Deck(cards=list(CARDS[:10]))
+    other_one = Deck(cards=[CARDS[20]])
+    other_bulk = Deck(cards=[CARDS[20]])
+
+    for i in range(3):
+        other_one.putOne(one.getOne())
+    other_bulk.give(bulk.take(3))
+    assert (one, other_one) == (bulk, other_bulk)
+
+    assert bulk.getManyCount(4) == list(CARDS[3:7])
+    assert bulk.take(10) == list(CARDS[7:10])
+    assert bulk.take(1) == []
@@ -0,0 +1,55 @@
+import pickle
+
+from codec import decodeActions, encodeActions, iterStates, stateSize
+from rules import RuleSet
+from solitaire import Action, Game, GameState, applyAction
+from test_solver import nearlyWonState
+
+
+def test_state_round_trip():
+    game = Game()
+    game.start(8)
+    state = game.state()
+    data = state.to_bytes()
+    assert len(data) == 55 == stateSize(data)
+
+    again = GameState.from_bytes(memoryview(data))
+    assert again.snapshot() == state.snapshot()
+    assert again.zobrist() == state.zobrist()
+    assert pickle.loads(pickle.dumps(state)).snapshot() == state.snapshot()
+
+    won = nearlyWonState()
+    assert GameState.from_bytes(won.to_bytes()).snapshot() == won.snapshot()
+    assert len(won.to_bytes()) < len(data)
+
+
+def test_rules_and_records():
+    game = Game(rules=RuleSet(draw=1, passes=3, columns=9, vegas=True))
+    game.start(2)
+    game.deal()
+    other = Game()
+    other.start(3)
+
+    buffer = game.state().to_bytes() + other.state().to_bytes()
+    first, second = iterStates(buffer)
+    assert first.rules == game.state().rules and second.rules == RuleSet()
+    assert first.snapshot() == game.state().snapshot()
+    assert second.snapshot() == other.state().snapshot()
+
+
+def test_actions():
+    actions = [Action(src="T", dest="c", src_cards=[]), Action(src="X", dest="", src_cards=[]),
+               Action(src="7", dest="2", src_cards=[]), Action(src="T", dest="4", src_cards=[], deals=5)]
+    data = encodeActions(actions)
+    assert len(data) == 5
+    assert [(a.src, a.dest, a.deals) for a in decodeActions(data)] == [(a.src, a.dest, a.deals) for a in actions]
+
+    game, copy = Game(), Game()
+    game.start(8)
+    copy.start(8)
+    moves = [next(game.moves()) for _ in range(1)] + [Action(src="X", dest="", src_cards=[])]
+    for action in moves:
+        applyAction(game, action)
+    for action in decodeActions(encodeActions(moves)):
+        applyAction(copy, action)
+    assert copy.state().snapshot() == game.state().snapshot()
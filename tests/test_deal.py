@@ -1,3 +1,7 @@
+from card_model import Card, CardSuit, CardValue, Deck
+from solitaire import BuildStack, Game, GameState, SuitStack, executeInput, renderState
+
+
 def test_deal_1():
     cards = [Card(suit=CardSuit.SPADES, value=CardValue.ACE),
              Card(suit=CardSuit.SPADES, value=CardValue.TWO),
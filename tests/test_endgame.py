@@ -0,0 +1,72 @@
+from card_model import CardSuit, Deck
+from endgame import forcedWin, heights, isSafeFoundation, isWonByForce
+from solitaire import BuildStack, Game, GameState, SuitStack, executeInput
+from solver import solve
+from test_solver import nearlyWonState
+
+
+def openState() -> GameState:
+    """ every suit is on its SuitStack up to 10, the J Q K of each suit are face up on four BuildStacks"""
+    suitstacks = {k: SuitStack(suit=s) for k, s in
+                  [("c", CardSuit.CLUBS), ("d", CardSuit.DIAMONDS), ("h", CardSuit.HEARTS), ("s", CardSuit.SPADES)]}
+    for stack in suitstacks.values():
+        base = stack.suit_index * 13
+        stack.deck.codes.extend(range(base, base + 10))
+
+    # code = suit * 13 + rank - 1: spades 0, clubs 1, diamonds 2, hearts 3
+    buildstacks = [BuildStack() for i in range(7)]
+    buildstacks[0].visible_deck.codes.extend([13 + 12, 26 + 11, 13 + 10])   # K clubs, Q diamonds, J clubs
+    buildstacks[1].visible_deck.codes.extend([39 + 12, 11, 39 + 10])        # K hearts, Q spades, J hearts
+    buildstacks[2].visible_deck.codes.extend([26 + 12, 13 + 11, 26 + 10])   # K diamonds, Q clubs, J diamonds
+    buildstacks[3].visible_deck.codes.extend([12, 39 + 11, 10])             # K spades, Q hearts, J spades
+    return GameState(suitstacks=suitstacks, buildstacks=buildstacks, talon=Deck(), deal_deck=Deck())
+
+
+def test_won_by_force():
+    assert isWonByForce(openState())
+    assert not isWonByForce(nearlyWonState())
+
+
+def test_forced_win_replays():
+    state = openState()
+    actions = forcedWin(state)
+    assert len(actions) == 12
+    assert sum(b.visible_deck.size() for b in state.buildstacks) == 12  # not changed
+
+    game = Game(game_state=state)
+    for action in actions:
+        executeInput(game, firstToken=action.src, secondToken=action.dest)
+    assert game.state().isWon()
+
+
+def test_auto_complete_undoes():
+    game = Game(game_state=openState())
+    before = game.state().zobrist()
+    changed = []
+    game.subscribe(lambda g, ids: changed.append(g.state().zobrist()))
+
+    mark = game.mark()
+    assert game.autoComplete() == 12
+    assert game.state().isWon()
+    assert changed
+
+    game.undo(mark)
+    assert game.state().zobrist() == before
+    assert changed[-1] == before  # listeners are told after the undo, not before
+    assert Game(game_state=nearlyWonState()).autoComplete() == 0
+
+
+def test_safe_foundation():
+    # spades 0, clubs 1, diamonds 2, hearts 3
+    assert isSafeFoundation(1, [0, 0, 0, 0])               # 2 of spades
+    assert isSafeFoundation(26 + 4, [3, 3, 4, 2])          # 5 of diamonds, black SuitStacks at 3, hearts at 2
+    assert not isSafeFoundation(26 + 4, [2, 3, 4, 3])      # a black 4 may still need it
+    assert not isSafeFoundation(26 + 4, [3, 3, 4, 1])      # hearts too low: the black 3s may need the red 4s
+    assert heights(openState()) == [10, 10, 10, 10]
+
+
+def test_solve_plays_out_the_end():
+    result = solve(openState())
+    assert result.winnable is True
+    assert result.nodes == 0
+    assert len(result.actions) == 12
@@ -0,0 +1,88 @@
+import asyncio
+
+from card_model import CARDS, Deck
+from hints import WON, HintEngine
+from solitaire import BuildStack, Game, GameState, applyAction, executeInput
+from test_solver import nearlyWonState
+
+
+def test_hints_reuse_the_tree():
+    game = Game()
+    game.start(8)
+    engine = game.hintEngine()
+    assert engine is game.hintEngine()
+
+    hints = engine.hints()
+    assert 0 < len(hints) <= 3
+    engine.deepen(0.05)
+    best = engine.root.ranked()[0]
+    grandchildren = best.children
+
+    applyAction(game, best.action)
+    assert engine.sync() is True
+    assert engine.root is best and engine.root.children is grandchildren
+    assert engine.best() is not None
+
+    # the engine searched on its own copy
+    assert engine.search.state().zobrist() == game.state().zobrist()
+
+
+def test_same_cards_in_another_column_rebuild_the_tree():
+    # BuildStacks 1 and 2 empty, the K of clubs on 3 can go to either: the Zobrist hash is the same
+    state = nearlyWonState()
+    buildstacks = [BuildStack() for _ in range(7)]
+    buildstacks[2].hidden_deck.codes.append(12)                         # K spades
+    buildstacks[2].visible_deck.codes.append(13 + 12)                   # K clubs
+    buildstacks[3].visible_deck.codes.extend([39 + 12, 11])         # K hearts, Q spades
+    buildstacks[4].visible_deck.codes.extend([26 + 12, 13 + 11])    # K diamonds, Q clubs
+    state = GameState(suitstacks=state.suitstacks, buildstacks=buildstacks, talon=Deck(cards=[CARDS[26 + 11]]),
+                      deal_deck=Deck(cards=[CARDS[c] for c in (13 + 10, 39 + 11, 10, 39 + 10, 26 + 10)]))
+    game = Game(game_state=state)
+    engine = game.hintEngine()
+    assert "3-1" in [action.display() for action, _ in engine.hints(5)]
+
+    executeInput(game, "3", "2")
+    assert engine.sync() is False
+    legal = {a.display() for a in game.moves()} | {"X"}
+    assert {action.display() for action, _ in engine.hints(5)} <= legal
+
+
+def test_king_moved_to_another_column_rebuilds_the_tree():
+    # a lone K of clubs on 3 moved to the empty BuildStack 1: the Zobrist hash does not change
+    state = nearlyWonState()
+    buildstacks = [BuildStack() for _ in range(7)]
+    buildstacks[2].visible_deck.codes.append(13 + 12)                   # K clubs
+    buildstacks[3].visible_deck.codes.extend([39 + 12, 11])         # K hearts, Q spades
+    buildstacks[4].visible_deck.codes.extend([26 + 12, 13 + 11])    # K diamonds, Q clubs
+    state = GameState(suitstacks=state.suitstacks, buildstacks=buildstacks, talon=Deck(cards=[CARDS[26 + 11]]),
+                      deal_deck=Deck(cards=[CARDS[c] for c in (13 + 10, 39 + 11, 10, 39 + 10, 26 + 10, 12)]))
+    game = Game(game_state=state)
+    engine = game.hintEngine()
+    engine.hints(5)
+    key = game.state().zobrist()
+
+    executeInput(game, "3", "1")
+    assert game.state().zobrist() == key and game.state().buildstacks[0].visible_deck.codes
+    assert engine.sync() is False
+    legal = {a.display() for a in game.moves()} | {"X"}
+    assert {action.display() for action, _ in engine.hints(5)} <= legal
+    assert engine.search.state().to_bytes() == game.state().to_bytes()
+
+
+def test_hints_find_the_win():
+    game = Game(game_state=nearlyWonState())
+    engine = HintEngine(game)
+    asyncio.run(engine.think(2.0))
+    action, value = engine.hints(1)[0]
+    assert value == WON
+
+
+def test_unknown_move_starts_over():
+    game = Game()
+    game.start(8)
+    engine = HintEngine(game)
+    engine.deepen(0.01)
+    game.deal()
+    game.deal()
+    assert engine.sync() is False
+    assert engine.root.children is None
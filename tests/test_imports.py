@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+ENGINE = "card_model, rules, zobrist, talon, solitaire, solver, simulate, codec, store, parallel, hints, endgame, policy, replay, server"
+UI = ("rich", "textual", "numpy", "cProfile")
+
+
+def run(code: str) -> str:
+    """ stdout of code run in a fresh interpreter, in the source directory"""
+    src = os.path.join(os.path.dirname(__file__), "..", "src", "pysolitaire")
+    return subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True).stdout
+
+
+def loadedAfter(imports: str) -> set[str]:
+    return set(run(f"import sys\nimport {imports}\nprint(' '.join(sys.modules))").split())
+
+
+def test_engine_imports_no_ui():
+    loaded = loadedAfter(ENGINE)
+    assert not loaded & set(UI)
+
+
+def test_render_loads_rich_on_first_use():
+    # in a fresh interpreter: in this one the other tests may have loaded rich already
+    out = run("import sys\n"
+              "from solitaire import Game, renderState\n"
+              "print('rich' in sys.modules)\n"
+              "game = Game()\n"
+              "game.start(1)\n"
+              "renderState(game.state())\n"
+              "print('rich' in sys.modules)")
+    lines = out.splitlines()
+    assert lines[0] == "False" and lines[-1] == "True"
+    assert "BuildStack" in out
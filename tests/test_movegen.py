@@ -0,0 +1,70 @@
+import random
+
+from solitaire import Game, computeOptions, executeInput
+from test_undo import COMMANDS, randomCommand
+
+
+def changingCommands(game: Game) -> set[str]:
+    """ every src-dest command that changes the position, found by trying them all"""
+    state = game.state()
+    result = set()
+    for src, dest in COMMANDS:
+        before = state.snapshot()
+        mark = game.mark()
+        executeInput(game, src, dest)
+        changed = state.snapshot() != before
+        game.undo(mark)
+        if not changed:
+            continue
+
+        # a King already at the bottom of its pile is not moved to another empty pile
+        if src.isdigit() and dest.isdigit():
+            source = state.buildstacks[int(src) - 1]
+            if source.hidden_size() == 0 and source.peek().getIntValue() == 13:
+                continue
+        result.add(f"{src}-{dest}")
+    return result
+
+
+def test_moves_match_executeInput():
+    rng = random.Random(2)
+    game = Game()
+    game.start(2)
+
+    for _ in range(300):
+        moves = [a.display() for a in game.moves()]
+        assert len(moves) == len(set(moves))
+        assert set(moves) == changingCommands(game)
+        assert moves == [a.display() for a in computeOptions(game.state())]
+
+        if moves and rng.random() < 0.5:
+            src, dest = rng.choice(moves).split('-')
+            executeInput(game, src, dest)
+        else:
+            executeInput(game, *randomCommand(rng))
+    game.release()
+
+
+def test_pruned_moves_are_legal():
+    rng = random.Random(5)
+    game = Game()
+    game.start(5)
+
+    last = None
+    for _ in range(200):
+        moves = list(game.moves())
+        pruned = list(game.moves(prune=True, last=last))
+        assert {a.display() for a in pruned} <= {a.display() for a in moves}
+        if not moves:
+            break
+        last = rng.choice(moves)
+        executeInput(game, last.src, last.dest)
+
+
+def test_pruned_moves_leave_out_the_last_card():
+    game = Game()
+    game.start(1)
+    last = next(a for a in game.moves() if a.dest.isdigit())
+    executeInput(game, last.src, last.dest)
+    card = last.src_cards[0].code
+    assert all(a.src_cards[0].code != card for a in game.moves(prune=True, last=last))
@@ -0,0 +1,48 @@
+from card_model import Deck
+from parallel import solveParallel
+from rules import RuleSet
+from solitaire import BuildStack, Game, GameState, SuitStack, executeInput
+from solver import solve
+from test_solver import nearlyWonState
+
+
+def stuckState() -> GameState:
+    """ two BuildStacks, each King sits on the Queen the other King needs"""
+    state = nearlyWonState()
+    suitstacks = {k: SuitStack(suit=s.suit) for k, s in state.suitstacks.items()}
+    for stack in suitstacks.values():
+        base = stack.suit_index * 13
+        stack.deck.codes.extend(range(base, base + (11 if stack.suit_index in (0, 3) else 13)))
+
+    # spades 0, hearts 3
+    left, right = BuildStack(), BuildStack()
+    left.hidden_deck.codes.append(11)          # Q spades
+    left.visible_deck.codes.append(39 + 12)    # K hearts
+    right.hidden_deck.codes.append(39 + 11)    # Q hearts
+    right.visible_deck.codes.append(12)        # K spades
+    return GameState(suitstacks=suitstacks, buildstacks=[left, right], talon=Deck(), deal_deck=Deck(),
+                     rules=RuleSet(columns=2))
+
+
+def test_parallel_win_replays():
+    state = nearlyWonState()
+    result = solveParallel(state, workers=2, table_bits=12)
+    assert result.winnable is True
+
+    game = Game(game_state=state)
+    for action in result.actions:
+        executeInput(game, firstToken=action.src, secondToken=action.dest or None)
+    assert game.state().isWon()
+
+
+def test_parallel_proves_unwinnable():
+    assert solve(stuckState()).winnable is False
+    assert solveParallel(stuckState(), workers=2, table_bits=12).winnable is False
+
+
+def test_parallel_budget():
+    game = Game()
+    game.start(3)
+    result = solveParallel(game.state(), workers=2, max_nodes=600, table_bits=12)
+    assert result.winnable is None
+    assert result.nodes >= 600
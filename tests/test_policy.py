@@ -0,0 +1,50 @@
+import functools
+import random
+
+from policy import BeamPolicy, compareWithSolver, evaluate, moveDelta
+from simulate import playGame, run
+from solitaire import Game, applyAction
+from solver import orderedActions
+
+
+def test_move_delta_matches_evaluate():
+    rng = random.Random(7)
+    game = Game()
+    game.start(7)
+    state = game.state()
+
+    for _ in range(100):
+        actions = orderedActions(game)
+        if not actions:
+            break
+        before = evaluate(game)
+        for action in actions:
+            if action.src == "T" or not action.dest:
+                continue  # the talon term is an estimate
+            mark = game.mark()
+            delta = moveDelta(state, action)
+            applyAction(game, action)
+            assert evaluate(game) - before == delta
+            game.undo(mark)
+        applyAction(game, rng.choice(actions))
+    game.release()
+
+
+def test_beam_policy_plays_whole_games():
+    narrow = functools.partial(BeamPolicy, width=2, depth=2)
+    first, again = playGame(3, narrow), playGame(3, narrow)
+    assert (first.won, first.moves, first.foundation) == (again.won, again.moves, again.foundation)
+    assert first.moves > 0
+
+    records, summary = run(range(4), policy=narrow, workers=2, chunk_size=2)
+    assert summary.games == 4
+
+
+def test_report_against_the_solver():
+    report = compareWithSolver(range(2), width=2, depth=2, max_nodes=2000)
+    assert report.games == 2
+    assert report.solvable + report.unsolved <= 2
+    assert report.wins <= report.games
+    assert report.solvable_wins <= min(report.wins, report.solvable)
+    assert 0.0 <= report.winRate() <= 1.0
+    assert report.gamesPerSecond() > 0
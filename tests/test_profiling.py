@@ -0,0 +1,23 @@
+import profiling
+import simulate
+import solitaire
+from card_model import Deck
+from simulate import playGame
+
+
+def test_counters_and_restore(tmp_path):
+    originals = solitaire.executeInput, simulate.executeInput, Deck.splice, solitaire.MoveGenerator.moves
+    path = str(tmp_path / "play.prof")
+    with profiling.profile(path, net_blocks=True):
+        assert simulate.executeInput is not originals[1]
+        record = playGame(3)
+
+    counters = profiling.counters
+    assert counters["Game.start"].calls == 1
+    assert counters["executeInput"].calls >= record.moves
+    assert counters["MoveGenerator.moves"].seconds > 0
+    assert "executeInput" in profiling.summary()
+    assert (tmp_path / "play.prof").stat().st_size > 0
+
+    assert (solitaire.executeInput, simulate.executeInput, Deck.splice, solitaire.MoveGenerator.moves) == originals
+    assert not profiling.enabled()
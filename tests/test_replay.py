@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from replay import ReplayLog, Replayer, readLog
+from test_endgame import openState
+from simulate import GreedyPolicy
+from solitaire import Game, executeInput
+
+
+def playRandom(game: Game, rng: random.Random, count: int) -> list[int]:
+    """ plays count random legal moves or deals.  Returns the Zobrist hash after each"""
+    keys = []
+    for _ in range(count):
+        moves = list(game.moves())
+        if moves and rng.random() < 0.7:
+            action = rng.choice(moves)
+            executeInput(game, action.src, action.dest)
+        else:
+            executeInput(game, "X")
+        keys.append(game.state().zobrist())
+    return keys
+
+
+def test_replay_reaches_every_position(tmp_path):
+    path = str(tmp_path / "games.log")
+    rng = random.Random(11)
+    with ReplayLog(path, batch_bytes=16) as log:
+        games = [Game(), Game()]
+        played = []
+        for seed, game in enumerate(games):
+            game.start(seed)
+            log.attach(game, seed)
+            played.append([game.state().zobrist()])
+        for _ in range(5):  # the games' moves interleave in the log
+            for keys, game in zip(played, games):
+                keys += playRandom(game, rng, 20)
+
+    logged = readLog(path)
+    assert sorted(logged) == [1, 2]
+    for gid, keys in zip((1, 2), played):
+        replayer = Replayer(logged[gid], every=16)
+        assert len(replayer) == len(keys) - 1
+        assert [state.zobrist() for state in replayer.positions()] == keys
+        for n in (57, 3, 100, 64, 0, 99):
+            assert replayer.seek(n).state().zobrist() == keys[n]
+        assert len(replayer.checkpoints) == 7
+
+
+def test_search_moves_are_not_logged(tmp_path):
+    path = str(tmp_path / "games.log")
+    with ReplayLog(path) as log:
+        game = Game()
+        game.start(4)
+        log.attach(game, 4)
+        policy = GreedyPolicy(4)
+        played = 0
+        for _ in range(10):
+            action = policy.choose(game)  # tries each move and takes it back
+            if action is None:
+                break
+            executeInput(game, action.src, action.dest or None)
+            played += 1
+        final = game.state().zobrist()
+
+    logged = readLog(path)[1]
+    assert logged.seed == 4
+    assert len(logged.moves) == played > 0
+    replayer = Replayer(logged)
+    assert replayer.seek(len(replayer)).state().zobrist() == final
+
+    with ReplayLog(path) as log:  # appending goes on with the next id
+        assert log.next_id == 2
+        with pytest.raises(BlockingIOError):
+            ReplayLog(path)  # it would hand out the same ids
+    with ReplayLog(path) as log:
+        assert log.next_id == 2
+
+
+def test_moves_under_a_mark_and_auto_complete_are_logged(tmp_path):
+    path = str(tmp_path / "games.log")
+    with ReplayLog(path) as log:
+        game = Game(game_state=openState())
+        log.attach(game)
+        game.mark()  # e.g. an undo point the player may go back to: these moves are still played
+        executeInput(game, "1", "c")
+        assert game.autoComplete() == 11
+        game.release()
+
+    replayer = Replayer(readLog(path)[1])
+    assert len(replayer) == 12
+    assert replayer.seek(len(replayer)).state().isWon()
+
+
+def test_illegal_moves_are_not_logged(tmp_path):
+    path = str(tmp_path / "games.log")
+    with ReplayLog(path) as log:
+        game = Game(game_state=openState())
+        log.attach(game)
+        changed = []
+        game.subscribe(lambda g, ids: changed.append(ids))
+        executeInput(game, "1", "2")  # J of clubs on the J of hearts
+        assert not changed
+        executeInput(game, "1", "c")
+        assert changed == [{"1", "c"}]
+
+    assert len(readLog(path)[1].moves) == 1
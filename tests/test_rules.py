@@ -0,0 +1,78 @@
+import pytest
+
+from rules import RuleSet
+from simulate import playGame
+from solitaire import Game
+
+
+def dealCycle(game: Game, deals: int) -> list[int]:
+    """ talon size after each deal"""
+    sizes = []
+    for _ in range(deals):
+        game.deal()
+        sizes.append(game.state().talon.size())
+    return sizes
+
+
+def test_draw_one_turns_one_card():
+    game = Game(rules=RuleSet(draw=1))
+    game.start(5)
+    assert dealCycle(game, 3) == [2, 3, 4]
+    assert game.state().deal_deck.size() == 20
+
+
+def test_limited_passes_stop_dealing():
+    game = Game(rules=RuleSet(draw=3, passes=2))
+    game.start(5)
+    while game.canDeal():
+        game.deal()
+    assert game.state().recycles == 1
+    assert game.state().deal_deck.size() == 0
+    assert game.state().talon.size() == 24
+
+
+def test_recycle_is_undone_and_hashed():
+    game = Game(rules=RuleSet(passes=3))
+    game.start(5)
+    state = game.state()
+    for _ in range(7):
+        game.deal()
+    before = state.zobrist()
+    mark = game.mark()
+    game.deal()  # recycles
+    assert state.recycles == 1
+    for _ in range(7):
+        game.deal()
+    # the same cards are showing but a pass was used
+    assert state.deal_deck.size() == 0 and state.talon.size() == 24
+    assert state.zobrist() != before
+    game.undo(mark)
+    assert state.recycles == 0 and state.zobrist() == before
+    assert state.clone().zobrist() == before
+
+
+def test_columns():
+    game = Game(rules=RuleSet(columns=5))
+    game.start(5)
+    state = game.state()
+    assert [b.hidden_size() + b.visible_deck.size() for b in state.buildstacks] == [1, 2, 3, 4, 5]
+    assert state.deal_deck.size() == 52 - 15 - 3
+    for action in game.moves():
+        assert action.src in "TXcdhs12345" and action.dest in "cdhs12345"
+    with pytest.raises(ValueError):
+        RuleSet(columns=10)
+    with pytest.raises(ValueError):
+        Game(game_state=state.clone(), rules=RuleSet(columns=7))
+    assert Game(game_state=state.clone(), rules=RuleSet(columns=5, draw=1)).draw == 1
+
+
+def test_vegas_score():
+    game = Game(rules=RuleSet(vegas=True))
+    game.start(5)
+    assert game.score() == -52
+    assert Game().score() == 0
+
+
+def test_default_rules_play_the_same_games():
+    first, again = playGame(4, rules=RuleSet()), playGame(4)
+    assert (first.won, first.moves, first.foundation) == (again.won, again.moves, again.foundation)
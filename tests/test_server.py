@@ -0,0 +1,69 @@
+import asyncio
+
+from replay import ReplayLog, Replayer, readLog
+from server import GameServer, loadTest
+
+
+def test_session_commands():
+    server = GameServer()
+    session, answer = server.execute(None, "new 8")
+    assert answer == f"session {session.token}"
+    assert server.execute(None, "moves")[1] == "error no session, send new"
+    assert server.execute(None, f"resume {session.id}")[1] == "error no such session"
+    assert server.execute(None, f"resume {session.token}")[0] is session
+
+    moves = server.execute(session, "moves")[1].split()
+    assert moves[-1] == "X"
+    assert server.execute(session, "9-c")[1] == "error illegal move"
+    assert server.execute(session, moves[0])[1].startswith("ok")
+    assert len(server.execute(session, "state")[1]) > 0
+
+    server.max_session_bytes = session.footprint() + 64
+    answers = [server.execute(session, "X")[1] for _ in range(100)]
+    assert "error session memory cap reached" in answers
+    assert session.token not in server.sessions and session.footprint() <= server.max_session_bytes + 64
+
+
+def test_games_are_logged(tmp_path):
+    path = str(tmp_path / "server.log")
+    server = GameServer(replay_log=ReplayLog(path))
+    session, _ = server.execute(None, "new 8")
+    for _ in range(3):
+        server.execute(session, server.execute(session, "moves")[1].split()[0])
+    assert server.evictIdle(session.last_used + server.idle_seconds + 1) == 1
+    assert session.id not in server.replay_log.moves  # detached, its moves written
+    assert session.game.recorder is None
+    server.replay_log.close()
+
+    logged = readLog(path)[session.id]
+    assert logged.seed == 8
+    replayer = Replayer(logged)
+    assert replayer.seek(len(replayer)).state().zobrist() == session.game.state().zobrist()
+
+
+def test_idle_eviction():
+    server = GameServer(idle_seconds=10, max_sessions=2)
+    first, _ = server.execute(None, "new 1")
+    second, _ = server.execute(None, "new 2")
+    assert server.evictIdle(first.last_used + 5) == 0
+    assert server.evictIdle(first.last_used + 11) == 2
+
+    server.execute(None, "new 3")
+    server.execute(None, "new 4")
+    server.execute(None, "new 5")  # over max_sessions: the least recently used goes
+    assert len(server.sessions) == 2
+
+
+def test_load_over_socket():
+    async def run():
+        server = GameServer()
+        port = await server.start()
+        try:
+            report = await loadTest("127.0.0.1", port, clients=5, moves=5)
+        finally:
+            await server.close()
+        return report, server.metrics.report(len(server.sessions))
+
+    report, metrics = asyncio.run(run())
+    assert report["clients"] == 5 and report["commands"] > 5
+    assert metrics["sessions"] == 5 and metrics["commands"] == report["commands"]
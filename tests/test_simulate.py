@@ -0,0 +1,21 @@
+from simulate import GreedyPolicy, RandomPolicy, playGame, run
+
+
+def outcome(records) -> list[tuple]:
+    return sorted((r.seed, r.won, r.moves, r.foundation) for r in records)
+
+
+def test_games_are_reproducible():
+    first = playGame(4, GreedyPolicy)
+    again = playGame(4, GreedyPolicy)
+    assert (first.won, first.moves, first.foundation) == (again.won, again.moves, again.foundation)
+    assert playGame(4, RandomPolicy).moves > 0
+
+
+def test_pool_matches_single_process():
+    seeds = list(range(6))
+    local, summary = run(seeds, workers=1)
+    pooled, pooled_summary = run(seeds, workers=2, chunk_size=2)
+    assert outcome(local) == outcome(pooled)
+    assert summary.games == pooled_summary.games == 6
+    assert summary.wins == sum(r.won for r in local)
@@ -0,0 +1,78 @@
+from card_model import CARDS, CardSuit, Deck
+from rules import RuleSet
+from solitaire import BuildStack, Game, GameState, SuitStack, executeInput
+from solver import solve
+
+
+def nearlyWonState() -> GameState:
+    """ every suit is on its SuitStack up to 10, the J Q K of each suit are left on the table"""
+    suitstacks = {k: SuitStack(suit=s) for k, s in
+                  [("c", CardSuit.CLUBS), ("d", CardSuit.DIAMONDS), ("h", CardSuit.HEARTS), ("s", CardSuit.SPADES)]}
+    for stack in suitstacks.values():
+        base = stack.suit_index * 13
+        stack.deck.codes.extend(range(base, base + 10))
+
+    # code = suit * 13 + rank - 1: spades 0, clubs 1, diamonds 2, hearts 3
+    buildstacks = [BuildStack() for i in range(7)]
+    buildstacks[0].hidden_deck.codes.extend([12])               # K spades hidden
+    buildstacks[0].visible_deck.codes.extend([13 + 12, 26 + 11])  # K clubs, Q diamonds
+    buildstacks[1].visible_deck.codes.extend([39 + 12, 11])     # K hearts, Q spades
+    buildstacks[2].visible_deck.codes.extend([26 + 12, 13 + 11, 26 + 10])   # K diamonds, Q clubs, J diamonds
+
+    talon = Deck(cards=[CARDS[39 + 10], CARDS[10]])             # J hearts, J spades
+    deal_deck = Deck(cards=[CARDS[13 + 10], CARDS[39 + 11]])    # J clubs, Q hearts
+    return GameState(suitstacks=suitstacks, buildstacks=buildstacks, talon=talon, deal_deck=deal_deck)
+
+
+def test_solve_replays_to_a_win():
+    state = nearlyWonState()
+    before = state.snapshot()
+
+    result = solve(state)
+    assert result.winnable is True
+    assert state.snapshot() == before  # the solver works on a copy
+
+    game = Game(game_state=state)
+    for action in result.actions:
+        executeInput(game, firstToken=action.src, secondToken=action.dest or None)
+    assert game.state().isWon()
+
+
+def test_node_budget():
+    game = Game()
+    game.start(3)
+    result = solve(game.state(), max_nodes=50)
+    assert result.winnable is None
+    assert result.nodes == 50
+
+
+def test_pruning_searches_fewer_moves():
+    unpruned, pruned = solve(nearlyWonState(), prune=False), solve(nearlyWonState(), measure=True)
+    assert unpruned.winnable is True and pruned.winnable is True
+    assert pruned.nodes < unpruned.nodes
+    assert pruned.branches <= pruned.legal
+
+
+def test_talon_ace_is_not_forced():
+    # clubs, diamonds and hearts are home.  Playing the A of spades off the talon first leaves 2 cards in the
+    # deal deck that a draw 3 deal cannot turn over
+    suitstacks = {k: SuitStack(suit=s) for k, s in
+                  [("c", CardSuit.CLUBS), ("d", CardSuit.DIAMONDS), ("h", CardSuit.HEARTS), ("s", CardSuit.SPADES)]}
+    for stack in suitstacks.values():
+        if stack.suit_index:
+            base = stack.suit_index * 13
+            stack.deck.codes.extend(range(base, base + 13))
+
+    column = BuildStack()
+    column.hidden_deck.codes.extend(range(4, 13))       # 5 .. K of spades, the 5 on top
+    column.visible_deck.codes.append(3)                 # 4 of spades
+    state = GameState(suitstacks=suitstacks, buildstacks=[column], talon=Deck(cards=[CARDS[0]]),
+                      deal_deck=Deck(cards=[CARDS[1], CARDS[2]]), rules=RuleSet(columns=1))
+
+    for prune in (False, True):
+        result = solve(state, prune=prune)
+        assert result.winnable is True
+        game = Game(game_state=state.clone())
+        for action in result.actions:
+            executeInput(game, firstToken=action.src, secondToken=action.dest or None)
+        assert game.state().isWon()
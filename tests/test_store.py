@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from simulate import run
+from store import RECORD, Store, StoreRecord
+
+
+def test_append_and_read(tmp_path):
+    path = str(tmp_path / "results.bin")
+    with Store(path) as store:
+        assert len(store) == 0 and store.seeds() == set()
+        store.append([StoreRecord(seed=1, won=True, moves=90, foundation=52, elapsed=0.5, deal=12345),
+                      StoreRecord(seed=2, won=None, moves=7, foundation=3, elapsed=1.0)])
+
+    with open(path, "ab") as f:
+        f.write(b"\0" * (RECORD.size // 2))  # a record half written by another process
+
+    with Store(path) as store:
+        assert len(store) == 2
+        first, second = store
+        assert first == StoreRecord(seed=1, won=True, moves=90, foundation=52, elapsed=0.5, deal=12345)
+        assert second.won is None
+        assert list(store.missing(range(4))) == [0, 3]
+
+
+def test_short_writes_are_finished(tmp_path, monkeypatch):
+    path = str(tmp_path / "results.bin")
+    write = os.write
+    monkeypatch.setattr(os, "write", lambda fd, data: write(fd, bytes(data[:10])))  # at most 10 bytes a call
+    with Store(path) as store:
+        assert store.append(StoreRecord(seed=s, won=True, moves=s, foundation=52, elapsed=0.1) for s in range(3)) == 3
+    monkeypatch.undo()
+
+    with Store(path) as store:
+        assert [r.seed for r in store] == [0, 1, 2]
+
+
+def test_campaign_resumes(tmp_path):
+    path = str(tmp_path / "campaign.bin")
+    first, _ = run(range(3), workers=1, store=path)
+    records, summary = run(range(5), workers=2, chunk_size=1, store=path)
+    assert sorted(r.seed for r in records) == [3, 4]
+
+    with Store(path) as store:
+        assert store.seeds() == set(range(5))
+        deals = {r.seed: r.deal for r in store}
+    assert deals[0] == first[0].deal
+
+
+def test_array(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "results.bin")
+    with Store(path) as store:
+        assert len(store.array()) == 0
+        store.append(StoreRecord(seed=s, won=s % 2 == 0, moves=s, foundation=s, elapsed=0.1) for s in range(10))
+        table = store.array()
+        assert table["won"].sum() == 5
+        assert np.array_equal(table["seed"], np.arange(10))
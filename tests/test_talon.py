@@ -0,0 +1,85 @@
+import random
+
+from rules import RuleSet
+from solitaire import Game, applyAction, executeInput
+from solver import expandActions, solve
+from talon import TalonIndex
+from test_solver import nearlyWonState
+
+
+def test_index_matches_dealing():
+    for rules in [RuleSet(), RuleSet(draw=1), RuleSet(passes=2)]:
+        game = Game(rules=rules)
+        game.start(11)
+        index = TalonIndex.fromGame(game)
+        state = game.state()
+        for deals, top in enumerate(index.tops()):
+            assert top == (state.talon.codes[0] if state.talon.codes else -1)
+            assert index.reach[top] <= deals
+            game.deal()
+        stock = set(state.talon.codes) | set(state.deal_deck.codes)
+        if rules.draw == 1:
+            assert index.reachable() == stock
+        else:
+            assert index.reachable() < stock  # draw 3 only brings up every third card
+
+
+def test_reachable_within_deals():
+    game = Game()
+    game.start(11)
+    index = TalonIndex.fromGame(game)
+    assert index.reachable(3) == set(index.tops()[:4])
+
+
+def test_played_matches_a_rebuild():
+    rng = random.Random(12)
+    for rules in [RuleSet(), RuleSet(draw=1), RuleSet(passes=2), RuleSet(passes=3)]:
+        for seed in range(4):
+            game = Game(rules=rules)
+            game.start(seed)
+            index = TalonIndex.fromGame(game)
+            talon = game.state().talon
+            for _ in range(10):
+                if not index.reach:
+                    break
+                deals = rng.choice(range(len(index.positions) + 5))  # past the end too, the deals repeat
+                for _ in range(deals):
+                    game.deal()
+                if not talon.codes:
+                    continue
+                index = index.played(deals)
+                talon.takeCodes(1)
+                fresh = TalonIndex.fromGame(game)
+                assert index.positions == fresh.positions and index.turns == fresh.turns
+                assert (index.reach, index.loop) == (fresh.reach, fresh.loop)
+
+
+def test_talon_moves_keep_the_index():
+    played = 0
+    for seed in range(4):
+        game = Game()
+        game.start(seed)
+        while moves := list(game.talonMoves()) + [a for a in game.moves() if a.src == "T"]:
+            applyAction(game, moves[0])
+            played += 1
+            # kept by applyAction, from the index of the position before
+            assert game.talon_indexes[game.talonKey()].positions == TalonIndex.fromGame(game).positions
+    assert played > 8
+
+
+def test_limited_passes_run_out():
+    game = Game(rules=RuleSet(passes=1))
+    game.start(11)
+    index = TalonIndex.fromGame(game)
+    assert len(index.tops()) == 8 and index.loop is None
+
+
+def test_solver_with_macros():
+    state = nearlyWonState()
+    result = solve(state, macros=True)
+    assert result.winnable is True
+
+    game = Game(game_state=state)
+    for action in expandActions(result.actions):
+        executeInput(game, firstToken=action.src, secondToken=action.dest or None)
+    assert game.state().isWon()
@@ -0,0 +1,46 @@
+import random
+
+from solitaire import Game, executeInput
+
+COMMANDS = [(s, d) for s in "T1234567cdhs" for d in "1234567cdhs" if s != d]
+
+
+def randomCommand(rng: random.Random) -> tuple:
+    # deal often enough to recycle the talon a few times
+    if rng.random() < 0.3:
+        return 'X', None
+    return rng.choice(COMMANDS)
+
+
+def test_undo_restores_state():
+    rng = random.Random(7)
+    game = Game()
+    game.start(7)
+
+    for _ in range(300):
+        before = game.state().snapshot()
+        mark = game.mark()
+        for _ in range(5):
+            executeInput(game, *randomCommand(rng))
+        game.undo(mark)
+        assert game.state().snapshot() == before
+        game.release()
+        assert game.journal is None
+
+        # keep playing for real
+        executeInput(game, *randomCommand(rng))
+
+
+def test_nested_marks():
+    game = Game()
+    game.start(1)
+    outer = game.mark()
+    first = game.state().snapshot()
+    executeInput(game, 'X')
+    inner = game.mark()
+    second = game.state().snapshot()
+    executeInput(game, 'X')
+    game.undo(inner)
+    assert game.state().snapshot() == second
+    game.undo(outer)
+    assert game.state().snapshot() == first
@@ -0,0 +1,46 @@
+import random
+
+from solitaire import Game, GameState, executeInput
+from test_undo import randomCommand
+
+
+def canonicalKey(state: GameState) -> bytes:
+    columns = sorted(bytes(b.hidden_deck.codes) + b'\xff' + bytes(b.visible_deck.codes) for b in state.buildstacks)
+    rest = [bytes(state.suitstacks[k].deck.codes) for k in sorted(state.suitstacks)]
+    return b'\xfe'.join([*rest, *columns, bytes(state.talon.codes), bytes(state.deal_deck.codes)])
+
+
+def test_incremental_hash_matches_fresh_hash():
+    rng = random.Random(11)
+    game = Game()
+    game.start(11)
+    state = game.state()
+    seen: dict[bytes, int] = {}
+
+    for _ in range(500):
+        mark = game.mark()
+        executeInput(game, *randomCommand(rng))
+        h = state.zobrist()
+        assert h == state.clone().zobrist()
+        assert seen.setdefault(canonicalKey(state), h) == h
+
+        game.undo(mark)
+        assert state.zobrist() == state.clone().zobrist()
+        executeInput(game, *randomCommand(rng))
+
+    # no two different positions share a hash
+    assert len(set(seen.values())) == len(seen)
+
+
+def test_column_order_does_not_change_hash():
+    game = Game()
+    game.start(5)
+    state = game.state()
+    h = state.zobrist()
+
+    swapped = state.clone()
+    swapped.buildstacks.reverse()
+    assert swapped.zobrist() == h
+
+    executeInput(game, 'X')
+    assert state.zobrist() != h